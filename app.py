@@ -4,22 +4,42 @@
 # @Author : yuyeqing
 # @File   : app.py
 # @IDE    : PyCharm
+import os
 import sys
-import csv
-import yaml
+import threading
+from functools import partial
+from PyQt6.QtCore import pyqtSignal, QThreadPool, QTimer
 from PyQt6.QtWidgets import QMainWindow, QWidget, QVBoxLayout, \
-    QFileDialog, QMessageBox, QApplication
-from PyQt6.QtGui import QAction, QIcon
-from share.resource import resource_path
-from components.image_manager import ImageManager
+    QFileDialog, QMessageBox, QApplication, QProgressBar, QInputDialog
+from PyQt6.QtGui import QAction, QKeySequence
+from share.resource import cached_icon
+from share.consts import OVERLAY_WIDGETS, OVERLAY_CANVAS
+from core.export import write_results_csv
+from core.profiling import PROFILER, format_summary
 from components.color_name_manager import ColorNameManager
+from components.tasks import Task
 
 
 class Application(QMainWindow):
+    # 埋点回调可能来自工作线程, 经信号转到界面线程
+    profile_recorded = pyqtSignal(object)
+    # 监视文件夹的结果在工作线程回调: 文件名, 结果, 错误
+    watch_result = pyqtSignal(str, object, object)
+
     def __init__(self):
         super(Application, self).__init__()
-        self.image_mgr = ImageManager(self, contour_changed_cb=self.on_contour_changed)
+        # 图像管理器依赖 NumPy/OpenCV, 在窗口首次绘制后再导入和构建, 见 _init_image_manager
+        self.image_mgr = None
+        self._image_mgr_scheduled = False
         self.color_mgr = ColorNameManager(self)
+        self.profile_recorded.connect(self.on_profile_record)
+        self._profile_listener = self.profile_recorded.emit
+        # 当前项目文件, Save Project 直接保存到这里
+        self._project_path = None
+        self._watcher = None
+        self._watch_task = None
+        self._watch_thread = None
+        self.watch_result.connect(self.on_watch_result)
         self._init_ui()
 
     def _init_ui(self):
@@ -29,56 +49,334 @@ class Application(QMainWindow):
         # menu bar
         menubar = self.menuBar()
         file_menu = menubar.addMenu("File")
-        img_load = QAction(QIcon(resource_path('assets/import.png')), "Load Image", self)
+        img_load = QAction(cached_icon('assets/import.png'), "Load Image", self)
         img_load.triggered.connect(self.load_image)
         file_menu.addAction(img_load)
-        data_export = QAction(QIcon(resource_path('assets/export.png')), "Export Data", self)
+        data_export = QAction(cached_icon('assets/export.png'), "Export Data", self)
         data_export.triggered.connect(self.export_to_csv)
         file_menu.addAction(data_export)
+        project_open = QAction("Open Project...", self)
+        project_open.triggered.connect(self.open_project)
+        file_menu.addAction(project_open)
+        project_save = QAction("Save Project", self)
+        project_save.setShortcut(QKeySequence(QKeySequence.StandardKey.Save))
+        project_save.triggered.connect(self.save_project)
+        file_menu.addAction(project_save)
+        project_save_as = QAction("Save Project As...", self)
+        project_save_as.triggered.connect(self.save_project_as)
+        file_menu.addAction(project_save_as)
+        self.embed_image_act = QAction("Embed Image in Project", self)
+        self.embed_image_act.setCheckable(True)
+        self.embed_image_act.setChecked(True)
+        file_menu.addAction(self.embed_image_act)
+        # 同一文件夹内的图像依次切换, 相邻图像在后台预读
+        prev_image = QAction("Previous Image", self)
+        prev_image.setShortcut(QKeySequence(QKeySequence.StandardKey.MoveToPreviousPage))
+        prev_image.triggered.connect(self.show_previous_image)
+        file_menu.addAction(prev_image)
+        next_image = QAction("Next Image", self)
+        next_image.setShortcut(QKeySequence(QKeySequence.StandardKey.MoveToNextPage))
+        next_image.triggered.connect(self.show_next_image)
+        file_menu.addAction(next_image)
+        cache_budget = QAction("Image Cache Budget...", self)
+        cache_budget.triggered.connect(self.set_cache_budget)
+        file_menu.addAction(cache_budget)
+        gray_mode = QAction("Low Memory Grayscale", self)
+        gray_mode.setCheckable(True)
+        gray_mode.toggled.connect(self.toggle_grayscale_only)
+        file_menu.addAction(gray_mode)
+        watch_start = QAction("Watch Folder...", self)
+        watch_start.triggered.connect(self.watch_folder)
+        file_menu.addAction(watch_start)
+        watch_stop = QAction("Stop Watching", self)
+        watch_stop.triggered.connect(self.stop_watching)
+        file_menu.addAction(watch_stop)
+        # 同一布局的图像序列 (曝光序列/重复膜) 套用当前条带框
+        template_save = QAction("Save Layout Template...", self)
+        template_save.triggered.connect(self.save_layout_template)
+        file_menu.addAction(template_save)
+        template_apply = QAction("Apply Layout to Images...", self)
+        template_apply.triggered.connect(self.apply_layout)
+        file_menu.addAction(template_apply)
 
         # config menu
         config_menu = menubar.addMenu("Config")
-        config_load = QAction(QIcon(resource_path('assets/import.png')), "Load Config", self)
+        config_load = QAction(cached_icon('assets/import.png'), "Load Config", self)
         config_load.triggered.connect(self.load_config)
         config_menu.addAction(config_load)
-        config_export = QAction(QIcon(resource_path('assets/export.png')), "Export Config", self)
+        config_export = QAction(cached_icon('assets/export.png'), "Export Config", self)
         config_export.triggered.connect(self.export_config)
         config_menu.addAction(config_export)
 
+        # profiling menu
+        profile_menu = menubar.addMenu("Profiling")
+        profile_act = QAction("Show Timings", self)
+        profile_act.setCheckable(True)
+        profile_act.toggled.connect(self.toggle_profiling)
+        profile_menu.addAction(profile_act)
+        profile_dump = QAction("Dump Timings", self)
+        profile_dump.triggered.connect(self.dump_profile)
+        profile_menu.addAction(profile_dump)
+
+        # status bar: 后台任务进度
+        self.progress_bar = QProgressBar(self)
+        self.progress_bar.setMaximumWidth(200)
+        self.progress_bar.hide()
+        self.statusBar().addPermanentWidget(self.progress_bar)
+
         # tools bar
         tb = self.addToolBar("Tools")
-        analyze_act = QAction(QIcon(resource_path('assets/analyze.png')), 'analyze', self)
+        analyze_act = QAction(cached_icon('assets/analyze.png'), 'analyze', self)
         analyze_act.triggered.connect(self.analyze_image)
         tb.addAction(analyze_act)
+        canvas_act = QAction('canvas overlay', self)
+        canvas_act.setCheckable(True)
+        canvas_act.toggled.connect(self.toggle_canvas_overlay)
+        tb.addAction(canvas_act)
+        # 一维投影引擎: 快, 对拖尾的泳道更稳
+        self.profile_engine_act = QAction('lane profile', self)
+        self.profile_engine_act.setCheckable(True)
+        self.profile_engine_act.toggled.connect(self.toggle_profile_engine)
+        tb.addAction(self.profile_engine_act)
+        sweep_act = QAction('parameter sweep', self)
+        sweep_act.triggered.connect(self.sweep_params)
+        tb.addAction(sweep_act)
+
+        # 依赖图像管理器的操作在其构建完成前不可用
+        self._image_actions = [img_load, data_export, project_open, project_save, project_save_as, prev_image,
+                               next_image, cache_budget, gray_mode, watch_start, template_save, template_apply,
+                               analyze_act, canvas_act, self.profile_engine_act, sweep_act]
+        for action in self._image_actions:
+            action.setEnabled(False)
 
         # add components
         main_widget = QWidget()
-        main_layout = QVBoxLayout()
+        self.main_layout = QVBoxLayout()
         
         # 添加顶部颜色管理器
-        main_layout.addWidget(self.color_mgr)
-        # 添加图像管理器
-        main_layout.addWidget(self.image_mgr)
-        main_widget.setLayout(main_layout)
+        self.main_layout.addWidget(self.color_mgr)
+        main_widget.setLayout(self.main_layout)
         self.setCentralWidget(main_widget)
 
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self._image_mgr_scheduled:
+            # 窗口已经画出, 再导入较重的模块
+            self._image_mgr_scheduled = True
+            QTimer.singleShot(0, self._init_image_manager)
+
+    def _init_image_manager(self):
+        from core.result_cache import ResultCache
+        from components.image_manager import ImageManager
+        self.image_mgr = ImageManager(self, contour_changed_cb=self.on_contour_changed, cache=ResultCache())
+        self.image_mgr.task_progress.connect(self.on_task_progress)
+        self.image_mgr.task_finished.connect(self.on_task_finished)
+        self.image_mgr.task_failed.connect(self.on_task_finished)
+        self.image_mgr.sweep_finished.connect(self.on_sweep_finished)
+        self.image_mgr.template_applied.connect(self.on_template_applied)
+        # 添加图像管理器
+        self.main_layout.addWidget(self.image_mgr)
+        for action in self._image_actions:
+            action.setEnabled(True)
+
+    def closeEvent(self, event):
+        watch_thread = self._watch_thread
+        self.stop_watching()
+        if self.image_mgr is not None:
+            # 取消在步骤之间生效, 等待当前步骤结束后再退出
+            self.image_mgr.cancel_tasks()
+            self.image_mgr.cancel_prefetch()
+            self.image_mgr.cancel_template()
+        QThreadPool.globalInstance().waitForDone()
+        watch_thread is not None and watch_thread.join()
+        if self.image_mgr is not None:
+            self.image_mgr.save_cached_results()
+            self.image_mgr.release_shared_gray()
+        super().closeEvent(event)
+
     def resizeEvent(self, event):
         super().resizeEvent(event)
-        self.image_mgr.resizeEvent(event)
+        if self.image_mgr is not None:
+            self.image_mgr.resizeEvent(event)
 
     def load_image(self):
-        path, _ = QFileDialog.getOpenFileName(self, 'Gel Picture', '', 'Images (*.png *.jpg)')
+        path, _ = QFileDialog.getOpenFileName(self, 'Gel Picture', '', 'Images (*.png *.jpg *.tif *.tiff)')
         if path:
-            self.image_mgr.load_image(path)
+            self._project_path = None
+            self.image_mgr.load_image_async(path)
+
+    def show_previous_image(self):
+        self.image_mgr.show_previous()
+
+    def show_next_image(self):
+        self.image_mgr.show_next()
+
+    def open_project(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Open Project", "", "Gel Projects (*.gelproj)")
+        if not path:
+            return
+        project = self.image_mgr.load_project_async(path)
+        if project is not None:
+            self._project_path = path
+            self.color_mgr.load_color_name_config({"color_names": project.color_names})
+            self._sync_engine_action()
+
+    def save_project(self):
+        if self._project_path is None:
+            self.save_project_as()
+            return
+        if self.image_mgr.gray is None:
+            QMessageBox.warning(self, "Warning", "Please load an image first.")
+            return
+        try:
+            self.image_mgr.save_project(self._project_path, self.color_mgr.color_names,
+                                        self.embed_image_act.isChecked())
+            self.statusBar().showMessage(f"Project saved to {self._project_path}", 3000)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to save project: {e}")
+
+    def save_project_as(self):
+        if self.image_mgr.gray is None:
+            QMessageBox.warning(self, "Warning", "Please load an image first.")
+            return
+        path, _ = QFileDialog.getSaveFileName(self, "Save Project", "", "Gel Projects (*.gelproj)")
+        if path:
+            self._project_path = path
+            self.save_project()
 
     def analyze_image(self):
-        if self.image_mgr.original_image is None:
+        if self.image_mgr.gray is None and not self.image_mgr.loading:
             # popup
             QMessageBox.warning(self, "Warning", "Please load an image first.")
             return
-        self.image_mgr.analyze()
+        self.image_mgr.analyze_async()
+
+    def sweep_params(self):
+        if self.image_mgr.gray is None:
+            QMessageBox.warning(self, "Warning", "Please load an image first.")
+            return
+        self.image_mgr.sweep_async()
+
+    def on_sweep_finished(self, results):
+        from components.sweep_dialog import SweepDialog
+        SweepDialog(self, results, apply_cb=self.apply_sweep_params).exec()
+
+    def apply_sweep_params(self, params):
+        # 扫描结果来自轮廓引擎
+        self.image_mgr.apply_analysis_params(params)
+        self._sync_engine_action()
+
+    def _sync_engine_action(self):
+        # 参数由项目文件或扫描结果改变时同步工具栏状态, 不再触发一次分析
+        from core.pipeline import ENGINE_PROFILE
+        self.profile_engine_act.blockSignals(True)
+        self.profile_engine_act.setChecked(self.image_mgr.analysis_params.get('engine') == ENGINE_PROFILE)
+        self.profile_engine_act.blockSignals(False)
+
+    def toggle_profile_engine(self, checked):
+        from core.pipeline import ENGINE_PROFILE, ENGINE_CONTOURS
+        self.image_mgr.set_analysis_params(engine=ENGINE_PROFILE if checked else ENGINE_CONTOURS)
+
+    def on_task_progress(self, task_name, stage, done, total):
+        self.statusBar().showMessage(f"{task_name}: {stage}...")
+        self.progress_bar.setRange(0, total)
+        self.progress_bar.setValue(done)
+        self.progress_bar.show()
+
+    def on_task_finished(self, task_name, *_):
+        self.progress_bar.hide()
+        self.statusBar().clearMessage()
+        # 载入时缓存命中会恢复上次的结果, 分析完成后结果整体替换
         self.color_mgr.update_color_names(self.image_mgr.results)
 
+    def toggle_grayscale_only(self, checked):
+        # 对下一次载入的图像生效
+        self.image_mgr.grayscale_only = checked
+        self.image_mgr.cancel_prefetch()
+
+    def set_cache_budget(self):
+        current = self.image_mgr.session.cache.budget_bytes // (1024 * 1024)
+        budget, ok = QInputDialog.getInt(self, "Image Cache Budget", "Decoded image cache (MB):", current, 64, 65536)
+        if ok:
+            self.image_mgr.set_cache_budget(budget * 1024 * 1024)
+
+    def watch_folder(self):
+        folder = QFileDialog.getExistingDirectory(self, "Watch Folder")
+        if not folder:
+            return
+        import multiprocessing
+        from core.watch import FolderWatcher
+        from core.pipeline import analyze_file
+        self.stop_watching()
+        csv_path = os.path.join(folder, 'watch_results.csv')
+        # 使用当前的颜色名与分析参数; 界面进程中的线程较多, 工作进程用 spawn 启动
+        analyze = partial(analyze_file, grayscale_only=self.image_mgr.grayscale_only,
+                          analysis_params=dict(self.image_mgr.analysis_params))
+        try:
+            self._watcher = FolderWatcher(folder, csv_path, analyze, dict(self.color_mgr.color_names),
+                                          mp_context=multiprocessing.get_context('spawn'),
+                                          on_result=self.watch_result.emit)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to watch folder: {e}")
+            return
+        task = Task('watch', self._watcher.run)
+        task.signals.failed.connect(lambda message: self.on_watch_failed(task, message))
+        self._watch_task = task
+        # 轮询一直运行到停止, 不占用全局线程池的线程
+        self._watch_thread = threading.Thread(target=task.run, name='watch')
+        self._watch_thread.start()
+        self.statusBar().showMessage(f"Watching {folder} -> {csv_path}")
+
+    def stop_watching(self):
+        # 已提交的文件分析完并写出后工作线程才退出
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watch_task.cancel()
+        self._watcher = None
+        self._watch_task = None
+        self._watch_thread = None
+
+    def on_watch_result(self, file_name, results, error):
+        backlog = self._watcher.backlog if self._watcher is not None else 0
+        if error is not None:
+            self.statusBar().showMessage(f"watch: {file_name} failed: {error} (backlog {backlog})")
+        else:
+            self.statusBar().showMessage(f"watch: {file_name} {len(results)} groups (backlog {backlog})")
+
+    def on_watch_failed(self, task, message):
+        if task is not self._watch_task:
+            return
+        self.stop_watching()
+        QMessageBox.warning(self, "Error", f"Folder watching stopped: {message}")
+
+    def toggle_canvas_overlay(self, checked):
+        self.image_mgr.set_overlay_mode(OVERLAY_CANVAS if checked else OVERLAY_WIDGETS)
+
+    def toggle_profiling(self, checked):
+        # 关闭时不记录, 埋点只剩一次属性判断
+        if checked:
+            PROFILER.start()
+            PROFILER.listeners.append(self._profile_listener)
+        else:
+            PROFILER.stop()
+            if self._profile_listener in PROFILER.listeners:
+                PROFILER.listeners.remove(self._profile_listener)
+
+    def on_profile_record(self, records):
+        self.statusBar().showMessage(format_summary(records))
+
+    def dump_profile(self):
+        if not PROFILER.records:
+            QMessageBox.warning(self, "Warning", "No timings recorded. Enable Profiling > Show Timings first.")
+            return
+        try:
+            path, _ = QFileDialog.getSaveFileName(self, "Save Timings", "", "JSON Lines (*.jsonl)")
+            if path:
+                PROFILER.dump(path)
+                QMessageBox.information(self, "Success", "Timings exported successfully.")
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to export timings: {e}")
+
     def on_contour_changed(self, results):
         self.color_mgr.update_color_names(results)
 
@@ -89,34 +387,57 @@ class Application(QMainWindow):
         try:
             path, _ = QFileDialog.getSaveFileName(self, "Save CSV", "", "CSV Files (*.csv)")
             if path:
-                color_name_dict = self.color_mgr.color_names
                 with open(path, 'w', newline='') as csvfile:
-                    fieldnames = ['Group', ] + [color_name for _, color_name in color_name_dict.items()]
-                    writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                    writer.writeheader()
-                    for group_idx in range(len(self.image_mgr.results)):
-                        if not self.image_mgr.results[group_idx]:
-                            continue
-                        group_data = {
-                            'Group': self.image_mgr.group_names.get(group_idx, f"Group{group_idx}"),
-                        }
-                        for contour_idx in range(len(self.image_mgr.results[group_idx])):
-                            res = self.image_mgr.results[group_idx][contour_idx]
-                            if res is None:
-                                gray_data = None
-                            else:
-                                gray_data = res[-1]
-                            group_data[color_name_dict[contour_idx]] = gray_data
-                        writer.writerow(group_data)
+                    write_results_csv(csvfile, self.image_mgr.results,
+                                      self.image_mgr.group_names, self.color_mgr.color_names)
                 QMessageBox.information(self, "Success", "Data exported successfully.")
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to export data: {e}")
 
+    def save_layout_template(self):
+        if not self.image_mgr.results:
+            QMessageBox.warning(self, "Warning", "No analyzed data to save as a template.")
+            return
+        path, _ = QFileDialog.getSaveFileName(self, "Save Layout Template", "", "Layout Templates (*.npz)")
+        if not path:
+            return
+        try:
+            self.image_mgr.layout_template().save(path)
+            self.statusBar().showMessage(f"Layout template saved to {path}", 3000)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to save layout template: {e}")
+
+    def apply_layout(self):
+        # 已有结果时直接使用当前条带框, 否则从模板文件读取
+        if self.image_mgr.results:
+            template = self.image_mgr.layout_template()
+        else:
+            path, _ = QFileDialog.getOpenFileName(self, "Open Layout Template", "", "Layout Templates (*.npz)")
+            if not path:
+                return
+            from core.template import load_template
+            try:
+                template = load_template(path)
+            except Exception as e:
+                QMessageBox.critical(self, "Error", f"Failed to load layout template: {e}")
+                return
+        image_paths, _ = QFileDialog.getOpenFileNames(self, "Aligned Images", "", "Images (*.png *.jpg *.tif *.tiff)")
+        if not image_paths:
+            return
+        csv_path, _ = QFileDialog.getSaveFileName(self, "Save CSV", "", "CSV Files (*.csv)")
+        if csv_path:
+            self.image_mgr.apply_template_async(template, image_paths, csv_path, self.color_mgr.color_names)
+
+    def on_template_applied(self, csv_path, image_count):
+        self.statusBar().showMessage(f"Layout applied to {image_count} images -> {csv_path}", 5000)
+
     def export_config(self):
         if not self.color_mgr.color_names:
             QMessageBox.warning(self, "Warning", "No config data to export.")
             return
         config = self.color_mgr.export_color_name_config()
+        # yaml 只在读写配置时用到
+        import yaml
         try:
             path, _ = QFileDialog.getSaveFileName(self, "Save Config", "", "Yaml Files (*.yaml)")
             if path:
@@ -129,6 +450,7 @@ class Application(QMainWindow):
     def load_config(self):
         path, _ = QFileDialog.getOpenFileName(self, "Load Contour Color Name Config", "", "Yaml Files (*.yaml *.yml)")
         if path:
+            import yaml
             try:
                 with open(path, 'r') as f:
                     config = yaml.load(f, Loader=yaml.FullLoader)
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time   : 2026/10/17 10:05
+# @Author : yuyeqing
+# @File   : batch.py
+# @IDE    : PyCharm
+import os
+import sys
+import argparse
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import yaml
+from core.pipeline import analyze_file, ENGINE_STAGES, ENGINE_CONTOURS
+from core.profiling import PROFILER
+from core.session import list_images
+from core.export import ColorNames, write_results_csv, write_stack_csv
+from core.watch import FolderWatcher, DEFAULT_POLL_INTERVAL
+
+
+def load_color_names(config_path):
+    color_names = ColorNames()
+    if config_path:
+        with open(config_path, 'r') as f:
+            config = yaml.load(f, Loader=yaml.FullLoader)
+        color_names.update(config['color_names'])
+    return color_names
+
+
+def export_file(results, csv_path, color_names):
+    with open(csv_path, 'w', newline='') as csvfile:
+        write_results_csv(csvfile, results, dict(), ColorNames(color_names))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch analyze gel pictures into per-image CSV files.")
+    parser.add_argument('input_dir', help="directory containing gel pictures")
+    parser.add_argument('-o', '--output-dir', help="directory for CSV files, defaults to input_dir")
+    parser.add_argument('-c', '--config', help="color name config exported from the GUI (yaml)")
+    parser.add_argument('-j', '--workers', type=int, default=None, help="number of worker processes")
+    parser.add_argument('-e', '--engine', choices=sorted(ENGINE_STAGES), default=ENGINE_CONTOURS,
+                        help="band detector: 2-D contours or 1-D lane profiles")
+    parser.add_argument('-g', '--grayscale', action='store_true',
+                        help="decode straight to grayscale, keeping 16-bit depth")
+    parser.add_argument('--profile', help="append per-stage timings and peak memory as JSON lines to this file")
+    parser.add_argument('--watch', action='store_true',
+                        help="keep polling input_dir and append new pictures to a rolling CSV until interrupted")
+    parser.add_argument('--template', help="apply this layout template (saved from the GUI) to all pictures "
+                                           "and write one wide CSV instead of analyzing each picture")
+    parser.add_argument('--csv', help="rolling CSV for --watch (default output_dir/watch_results.csv) or "
+                                      "wide CSV for --template (default output_dir/template_results.csv)")
+    parser.add_argument('--interval', type=float, default=DEFAULT_POLL_INTERVAL, help="--watch polling interval (s)")
+    args = parser.parse_args(argv)
+
+    output_dir = args.output_dir or args.input_dir
+    os.makedirs(output_dir, exist_ok=True)
+    color_names = load_color_names(args.config)
+    if args.watch:
+        return watch(args, output_dir, color_names)
+    if args.template:
+        return apply_layout(args, output_dir, color_names)
+    image_paths = list_images(args.input_dir)
+    failed = 0
+    # 每个工作进程各自记录, 按行追加到同一文件
+    initializer, initargs = (PROFILER.start, (True, args.profile)) if args.profile else (None, ())
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=initializer, initargs=initargs) as executor:
+        futures = {executor.submit(analyze_file, path, args.grayscale, {'engine': args.engine}): path for path in image_paths}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                results = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"{path}: {e}", file=sys.stderr)
+                continue
+            csv_path = os.path.join(output_dir, os.path.splitext(os.path.basename(path))[0] + '.csv')
+            export_file(results, csv_path, color_names)
+            print(f"{path}: {len(results)} groups -> {csv_path}")
+    return 1 if failed else 0
+
+
+def apply_layout(args, output_dir, color_names):
+    from core.template import load_template, apply_template
+    template = load_template(args.template)
+    image_paths = list_images(args.input_dir)
+    values = apply_template(template, image_paths, anydepth=args.grayscale)
+    csv_path = args.csv or os.path.join(output_dir, 'template_results.csv')
+    with open(csv_path, 'w', newline='') as csvfile:
+        write_stack_csv(csvfile, template.results, values, [os.path.basename(path) for path in image_paths],
+                        template.group_names, color_names)
+    print(f"{len(template)} bands x {len(image_paths)} images -> {csv_path}")
+    return 0
+
+
+def print_watch_result(file_name, results, error):
+    if error is not None:
+        print(f"{file_name}: {error}", file=sys.stderr)
+    else:
+        print(f"{file_name}: {len(results)} groups")
+
+
+def watch(args, output_dir, color_names):
+    csv_path = args.csv or os.path.join(output_dir, 'watch_results.csv')
+    analyze = partial(analyze_file, grayscale_only=args.grayscale, analysis_params={'engine': args.engine})
+    watcher = FolderWatcher(args.input_dir, csv_path, analyze, color_names, workers=args.workers,
+                            poll_interval=args.interval, on_result=print_watch_result)
+    print(f"Watching {args.input_dir} -> {csv_path} ({len(watcher.index)} files already processed)")
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time   : 2026/10/20 19:20
+# @Author : yuyeqing
+# @File   : bench_engines.py
+# @IDE    : PyCharm
+"""轮廓引擎与泳道一维投影引擎的耗时和检出条带数对比 (合成图像的真实条带数已知)
+
+python benchmarks/bench_engines.py --megapixels 1 16 64 --smear 0 0.5
+"""
+import os
+import sys
+import json
+import time
+import argparse
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.pipeline import AnalysisPipeline, ENGINE_CONTOURS, ENGINE_PROFILE
+from synthetic import synthetic_gel, size_for_megapixels
+
+
+def timed_run(gray, engine, threshold):
+    # 背景阈值两者相同, 预先给定, 只比较检测本身
+    pipeline = AnalysisPipeline(gray, engine=engine, background_threshold=threshold)
+    start = time.perf_counter()
+    groups = pipeline.run()
+    return groups, 1000 * (time.perf_counter() - start)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--megapixels', type=float, nargs='+', default=[1, 16, 64])
+    parser.add_argument('--smear', type=float, nargs='+', default=[0.0, 0.5])
+    parser.add_argument('--lanes', type=int, default=12)
+    parser.add_argument('--bands', type=int, default=10, help="bands per lane")
+    args = parser.parse_args(argv)
+
+    for megapixels in args.megapixels:
+        width, height = size_for_megapixels(megapixels)
+        for smear in args.smear:
+            gray = synthetic_gel(width, height, lanes=args.lanes, bands_per_lane=args.bands, smear=smear)
+            threshold = AnalysisPipeline(gray).background_threshold
+            record = {"shape": [height, width], "smear": smear, "expected_bands": args.lanes * args.bands}
+            for engine in (ENGINE_CONTOURS, ENGINE_PROFILE):
+                groups, ms = timed_run(gray, engine, threshold)
+                record[engine] = {"ms": ms, "lanes": len(groups), "bands": sum(len(group) for group in groups)}
+            record["speedup"] = record[ENGINE_CONTOURS]["ms"] / record[ENGINE_PROFILE]["ms"]
+            print(json.dumps(record))
+
+
+if __name__ == '__main__':
+    main()
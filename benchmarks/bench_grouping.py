@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time   : 2026/10/17 15:10
+# @Author : yuyeqing
+# @File   : bench_grouping.py
+# @IDE    : PyCharm
+"""校验 group_contours 与原始 O(n^2) 实现分组结果一致, 并对比耗时
+
+python benchmarks/bench_grouping.py --counts 100 1000 5000
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core import analysis
+
+
+def group_contours_reference(rects):
+    """原始实现, 作为对照"""
+    sorted_rects = sorted(rects, key=lambda r: (r[0], r[1]))  # Sort by x, then y
+
+    def is_same_group(group_rects, find_rect):
+        for rc in group_rects:
+            if max(rc[0] + rc[2], find_rect[0] + find_rect[2]) - min(rc[0], find_rect[0]) < rc[2] + find_rect[2]:
+                return True
+        return False
+
+    groups: list[list] = []
+    for rect in sorted_rects:
+        if not groups:
+            groups.append([rect, ])
+        else:
+            for group in groups:
+                if is_same_group(group, rect):
+                    group.append(rect)
+                    break
+            else:
+                groups.append([rect, ])
+    for group_idx, group in enumerate(groups):
+        groups[group_idx] = sorted(group, key=lambda r: r[1])
+    return groups
+
+
+def example_rects():
+    root = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'examples')
+    for name in sorted(os.listdir(root)):
+        gray = analysis.load_gray(os.path.join(root, name))
+        if gray is None:
+            continue
+        yield name, analysis.detect_rects(gray, analysis.estimate_background_threshold(gray))
+
+
+def random_rects(count, seed, width_range=(0, 60), x_range=2000):
+    """含噪声的随机条带, 包括零宽、重复坐标和跨泳道的宽条带"""
+    rng = random.Random(seed)
+    rects = []
+    for i in range(count):
+        x = rng.randrange(x_range)
+        w = rng.randint(*width_range)
+        if rng.random() < 0.02:
+            w *= 10
+        rects.append((x, rng.randrange(1000), w, rng.randint(1, 30), i))
+    return rects
+
+
+def lane_rects(count, seed, lane_pitch=50):
+    rng = random.Random(seed)
+    rects = []
+    for i in range(count):
+        lane = rng.randrange(max(1, count // 10))
+        rects.append((lane * lane_pitch + rng.randint(-5, 5), rng.randrange(1000),
+                      rng.randint(20, 40), rng.randint(5, 20), i))
+    return rects
+
+
+def check(name, rects):
+    expected = group_contours_reference(rects)
+    actual = analysis.group_contours(rects)
+    if actual != expected:
+        raise AssertionError(f"grouping mismatch on {name}")
+
+
+def timed(func, rects):
+    start = time.perf_counter()
+    func(rects)
+    return 1000 * (time.perf_counter() - start)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--counts', type=int, nargs='+', default=[100, 1000, 5000])
+    parser.add_argument('--seeds', type=int, default=200, help="number of random inputs to check")
+    args = parser.parse_args(argv)
+
+    for name, rects in example_rects():
+        check(name, rects)
+    for seed in range(args.seeds):
+        check(f"random seed {seed}", random_rects(random.Random(seed).randint(0, 300), seed))
+        check(f"lanes seed {seed}", lane_rects(random.Random(seed).randint(0, 300), seed))
+    print(json.dumps({"check": "ok", "seeds": args.seeds}))
+
+    for count in args.counts:
+        for kind, rects in (("random", random_rects(count, count, x_range=count * 5)),
+                            ("lanes", lane_rects(count, count))):
+            check(f"{kind} {count}", rects)
+            print(json.dumps({
+                "kind": kind,
+                "rects": count,
+                "reference_ms": timed(group_contours_reference, rects),
+                "group_contours_ms": timed(analysis.group_contours, rects),
+            }))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time   : 2026/10/17 14:05
+# @Author : yuyeqing
+# @File   : bench_overlay.py
+# @IDE    : PyCharm
+"""对比两种条带框绘制模式下, 帧耗时随条带数量的变化
+
+QT_QPA_PLATFORM=offscreen python benchmarks/bench_overlay.py --counts 100 1000 5000
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from PyQt6.QtWidgets import QApplication, QMainWindow
+from share.consts import OVERLAY_WIDGETS, OVERLAY_CANVAS
+from core.band_table import BandTable
+from components.image_manager import ImageManager
+
+
+def make_results(band_count, bands_per_lane=10, lane_width=30, band_height=8):
+    lanes = max(1, band_count // bands_per_lane)
+    results = []
+    for lane in range(lanes):
+        x = 10 + lane * (lane_width + 10)
+        results.append([(x, 10 + i * (band_height + 4), lane_width, band_height, 0)
+                        for i in range(min(bands_per_lane, band_count - lane * bands_per_lane))])
+    return results
+
+
+def bench_mode(window, image_mgr, mode, band_count, repeat, bands_only=True):
+    results = make_results(band_count)
+    width = 20 + len(results) * 40
+    image_mgr.original_image = np.full((200, width, 3), 255, np.uint8)
+    image_mgr.gray = np.full((200, width), 255, np.uint8)
+    image_mgr.clean_data()
+    image_mgr.set_overlay_mode(mode)
+    image_mgr.results = BandTable.from_groups(results)
+    image_mgr.update()
+    image_mgr._resize_image_label()
+    if bands_only:
+        # 只统计条带框本身的绘制, 组名与灰度值列表对两种模式相同
+        for widget in list(image_mgr.group_name_objs.values()) + list(image_mgr.grey_value_list_objs.values()):
+            widget.hide()
+    update_times = []
+    frame_times = []
+    for i in range(repeat):
+        # 模拟窗口缩放: 改变尺寸后重新布局并完整绘制一帧
+        window.resize(1024 + (i % 2) * 64, 640 + (i % 2) * 32)
+        start = time.perf_counter()
+        image_mgr.update()
+        image_mgr._resize_image_label()
+        update_times.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        window.grab()
+        frame_times.append(time.perf_counter() - start)
+    return {
+        "mode": mode,
+        "bands": band_count,
+        "update_ms": 1000 * float(np.median(update_times)),
+        "frame_ms": 1000 * float(np.median(frame_times)),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--counts', type=int, nargs='+', default=[10, 100, 500, 1000, 2000])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--with-labels', action='store_true', help="also paint group names and value lists")
+    args = parser.parse_args(argv)
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    window = QMainWindow()
+    image_mgr = ImageManager(window)
+    window.setCentralWidget(image_mgr)
+    window.resize(1024, 640)
+    window.show()
+    app.processEvents()
+    for band_count in args.counts:
+        for mode in (OVERLAY_WIDGETS, OVERLAY_CANVAS):
+            print(json.dumps(bench_mode(window, image_mgr, mode, band_count, args.repeat,
+                                        bands_only=not args.with_labels)))
+            app.processEvents()
+
+
+if __name__ == '__main__':
+    main()
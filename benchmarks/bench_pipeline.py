@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time   : 2026/10/18 15:00
+# @Author : yuyeqing
+# @File   : bench_pipeline.py
+# @IDE    : PyCharm
+"""校验 AnalysisPipeline 与 analysis.analyze 结果一致, 并记录修改单个参数后重算的阶段和耗时
+
+python benchmarks/bench_pipeline.py --repeat 4
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core import analysis
+from core.pipeline import AnalysisPipeline
+
+EXAMPLE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'examples', 'gel_image.png')
+
+
+def timed_run(pipeline, **params):
+    pipeline.set_params(**params)
+    start = time.perf_counter()
+    groups = pipeline.run()
+    return groups, {
+        "params": params,
+        "ms": 1000 * (time.perf_counter() - start),
+        "stages": list(pipeline.last_run),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--image', default=EXAMPLE)
+    parser.add_argument('--repeat', type=int, default=4, help="tile the image repeat x repeat times")
+    args = parser.parse_args(argv)
+
+    gray = np.tile(analysis.load_gray(args.image), (args.repeat, args.repeat))
+    pipeline = AnalysisPipeline(gray)
+    groups, record = timed_run(pipeline)
+    if groups != analysis.analyze(gray):
+        raise AssertionError("pipeline result differs from analysis.analyze")
+    print(json.dumps(dict(record, shape=list(gray.shape))))
+
+    threshold = pipeline.background_threshold
+    for params in ({'background_threshold': threshold - 20},
+                   {'background_threshold': None, 'background_offset_ratio': 0.05},
+                   {'open_iterations': 1},
+                   {'blur_ksize': (7, 7)}):
+        groups, record = timed_run(pipeline, **params)
+        # 与不带缓存、从头计算的结果对照
+        if groups != AnalysisPipeline(gray, **pipeline.params).run():
+            raise AssertionError(f"cached pipeline result differs after {params}")
+        print(json.dumps(record))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time   : 2026/10/19 15:10
+# @Author : yuyeqing
+# @File   : bench_project.py
+# @IDE    : PyCharm
+"""项目文件的保存/打开耗时: 首次保存、编辑后增量保存、内存映射打开, 与解码 PNG 对比
+
+python benchmarks/bench_project.py --megapixels 200 --dir /tmp
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import cv2
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.band_table import BandTable
+from core.project import Project, save_project, load_project
+from synthetic import synthetic_gel, band_layout, size_for_megapixels
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, 1000 * (time.perf_counter() - start)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--megapixels', type=float, default=50)
+    parser.add_argument('--bands', type=int, default=1000)
+    parser.add_argument('--dir', default='.', help="directory for the temporary files")
+    args = parser.parse_args(argv)
+
+    width, height = size_for_megapixels(args.megapixels)
+    lanes = max(1, int(args.bands ** 0.5))
+    bands_per_lane = max(1, args.bands // lanes)
+    gray = synthetic_gel(width, height, lanes, bands_per_lane)
+    # 每条泳道一组, 数值不参与计时
+    layout = band_layout(width, height, lanes, bands_per_lane).reshape(lanes, bands_per_lane, 5)
+    results = BandTable.from_groups([[tuple(band[:4].tolist()) + (255,) for band in lane] for lane in layout])
+    png_path = os.path.join(args.dir, 'bench_project.png')
+    project_path = os.path.join(args.dir, 'bench_project.gelproj')
+    cv2.imwrite(png_path, gray)
+    try:
+        _, decode_ms = timed(lambda: cv2.imread(png_path, cv2.IMREAD_GRAYSCALE))
+        project = Project(results, results.copy(), {0: 'ladder'}, {0: 'IgG'}, png_path, gray)
+        full_bytes, full_ms = timed(lambda: save_project(project_path, project))
+        project = load_project(project_path)
+        project.results.delete(0, 0)
+        project.group_names[1] = 'sample'
+        incremental_bytes, incremental_ms = timed(lambda: save_project(project_path, project))
+        reopened, open_ms = timed(lambda: load_project(project_path))
+        if (reopened.results.bands != project.results.bands).any() or (reopened.gray != gray).any():
+            raise AssertionError("reopened project differs from the saved one")
+        print(json.dumps({
+            "shape": list(gray.shape), "bands": len(results.bands),
+            "png_decode_ms": decode_ms, "open_ms": open_ms,
+            "full_save_ms": full_ms, "full_save_bytes": full_bytes,
+            "incremental_save_ms": incremental_ms, "incremental_save_bytes": incremental_bytes,
+        }))
+    finally:
+        for path in (png_path, project_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
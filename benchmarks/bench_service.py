@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time   : 2026/10/19 22:10
+# @Author : yuyeqing
+# @File   : bench_service.py
+# @IDE    : PyCharm
+"""常驻分析服务的吞吐: 往返开销、连续提交小图的吞吐, 与每次新启动 batch.py 的耗时对比
+
+python benchmarks/bench_service.py --images 500 --megapixels 0.25 -j 4
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+import subprocess
+import cv2
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from core.service import AnalysisClient
+from synthetic import synthetic_gel, size_for_megapixels
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--images', type=int, default=500)
+    parser.add_argument('--megapixels', type=float, default=0.25)
+    parser.add_argument('-j', '--workers', type=int, default=None)
+    parser.add_argument('--pings', type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    temp_dir = tempfile.mkdtemp(prefix='bench_service_')
+    socket_path = os.path.join(temp_dir, 'analysis.sock')
+    server = None
+    try:
+        width, height = size_for_megapixels(args.megapixels)
+        # 少量不同的图重复写出, 生成耗时不计入
+        variants = [synthetic_gel(width, height, seed=seed) for seed in range(8)]
+        paths = []
+        for idx in range(args.images):
+            path = os.path.join(temp_dir, f'gel_{idx:05d}.png')
+            cv2.imwrite(path, variants[idx % len(variants)])
+            paths.append(path)
+
+        command = [sys.executable, os.path.join(ROOT, 'serve.py'), '-s', socket_path]
+        if args.workers:
+            command += ['-j', str(args.workers)]
+        start = time.perf_counter()
+        server = subprocess.Popen(command, cwd=ROOT, stdout=subprocess.PIPE, text=True)
+        server.stdout.readline()
+        startup_ms = 1000 * (time.perf_counter() - start)
+
+        with AnalysisClient(socket_path) as client:
+            pings = []
+            for _ in range(args.pings):
+                start = time.perf_counter()
+                client.ping()
+                pings.append(1e6 * (time.perf_counter() - start))
+            start = time.perf_counter()
+            failed = sum(result.error is not None for result in client.analyze_many(paths))
+            service_s = time.perf_counter() - start
+            client.shutdown()
+        server.wait()
+
+        # 对照: 每批新启动一次 batch.py (导入 + 进程池启动 + 分析)
+        command = [sys.executable, os.path.join(ROOT, 'batch.py'), temp_dir, '-o', os.path.join(temp_dir, 'csv')]
+        if args.workers:
+            command += ['-j', str(args.workers)]
+        start = time.perf_counter()
+        subprocess.run(command, cwd=ROOT, check=True, stdout=subprocess.DEVNULL)
+        batch_s = time.perf_counter() - start
+
+        print(json.dumps({
+            "images": args.images, "shape": [height, width], "failed": failed,
+            "service_startup_ms": startup_ms,
+            "ping_us": {"median": statistics.median(pings), "p99": sorted(pings)[int(0.99 * len(pings))]},
+            "service_s": service_s, "service_images_per_s": args.images / service_s,
+            "batch_s": batch_s, "batch_images_per_s": args.images / batch_s,
+        }))
+    finally:
+        if server is not None and server.poll() is None:
+            server.kill()
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time   : 2026/10/19 19:20
+# @Author : yuyeqing
+# @File   : bench_startup.py
+# @IDE    : PyCharm
+"""启动耗时: 每次在新进程中导入 app, 记录导入、窗口首次绘制与图像管理器就绪的毫秒数
+
+python benchmarks/bench_startup.py --repeat 5
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 在子进程中执行, 计时从解释器开始运行该脚本算起
+CHILD = r"""
+import os, sys, time, json
+start = time.perf_counter()
+sys.path.insert(0, os.getcwd())
+import app
+imported = time.perf_counter()
+from PyQt6.QtCore import QObject, QEvent, QTimer
+from PyQt6.QtWidgets import QApplication
+marks = {}
+
+
+class FirstPaint(QObject):
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Type.Paint and 'paint' not in marks:
+            marks['paint'] = time.perf_counter()
+            marks['modules'] = [name for name in ('numpy', 'cv2', 'yaml') if name in sys.modules]
+        return False
+
+
+qt_app = QApplication(sys.argv)
+paint_filter = FirstPaint()
+qt_app.installEventFilter(paint_filter)
+window = app.Application()
+window.show()
+
+
+def check_ready():
+    if window.image_mgr is None:
+        QTimer.singleShot(1, check_ready)
+        return
+    marks['ready'] = time.perf_counter()
+    qt_app.quit()
+
+
+QTimer.singleShot(0, check_ready)
+qt_app.exec()
+print(json.dumps({
+    "import_ms": 1000 * (imported - start),
+    "first_paint_ms": 1000 * (marks['paint'] - start),
+    "ready_ms": 1000 * (marks['ready'] - start),
+    "modules_at_paint": marks['modules'],
+}))
+"""
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    env = dict(os.environ)
+    env.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    runs = []
+    for _ in range(args.repeat):
+        output = subprocess.run([sys.executable, '-c', CHILD], cwd=ROOT, env=env, check=True,
+                                capture_output=True, text=True).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    summary = {key: statistics.median(run[key] for run in runs) for key in ('import_ms', 'first_paint_ms', 'ready_ms')}
+    print(json.dumps(dict(summary, repeat=args.repeat, modules_at_paint=runs[0]['modules_at_paint'])))
+
+
+if __name__ == '__main__':
+    main()
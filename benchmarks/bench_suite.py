@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time   : 2026/10/18 16:40
+# @Author : yuyeqing
+# @File   : bench_suite.py
+# @IDE    : PyCharm
+"""在合成凝胶图上测量各热点路径随图像尺寸与条带数量的耗时, 输出 JSON 便于跨版本对比
+
+python benchmarks/bench_suite.py --megapixels 1 16 200 --bands 10 1000 5000 -o bench.json
+"""
+import os
+import io
+import sys
+import json
+import time
+import platform
+import argparse
+import subprocess
+import numpy as np
+import cv2
+# GUI 部分在无显示环境下运行
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from PyQt6.QtCore import QT_VERSION_STR
+from PyQt6.QtWidgets import QApplication, QMainWindow
+from share.consts import OVERLAY_WIDGETS, OVERLAY_CANVAS
+from core import analysis
+from core.export import ColorNames, write_results_csv
+from components.image_manager import ImageManager
+from synthetic import synthetic_gel, size_for_megapixels
+
+
+def timed(func, repeat, setup=None):
+    """重复执行 func, 返回耗时中位数与最小值 (毫秒)"""
+    times = []
+    for _ in range(repeat):
+        setup and setup()
+        start = time.perf_counter()
+        func()
+        times.append(1000 * (time.perf_counter() - start))
+    return {"median_ms": float(np.median(times)), "min_ms": float(np.min(times))}
+
+
+def lane_layout(band_count, width, height):
+    """条带数量 -> (泳道数, 每道条带数), 每个条带占据宽约为高两倍的格子
+
+    图像过小时条带高度不足开运算核, 检测到的数量会少于请求数量, 以 bands_detected 为准.
+    """
+    lanes = max(1, int(round((band_count * width / height / 2) ** 0.5)))
+    return lanes, max(1, -(-band_count // lanes))
+
+
+def metadata():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True,
+                                text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "commit": commit,
+        "time": time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+        "qt": QT_VERSION_STR,
+    }
+
+
+def bench_case(window, image_mgr, megapixels, band_count, args):
+    width, height = size_for_megapixels(megapixels)
+    lanes, bands_per_lane = lane_layout(band_count, width, height)
+    gray = synthetic_gel(width, height, lanes, bands_per_lane, args.noise, args.smear, args.seed)
+    record = {
+        "megapixels": megapixels,
+        "width": width,
+        "height": height,
+        "bands_requested": band_count,
+        "lanes": lanes,
+        "bands_per_lane": bands_per_lane,
+        "overlay": args.overlay,
+    }
+
+    start = time.perf_counter()
+    image_mgr.set_image(gray)
+    record["set_image_ms"] = 1000 * (time.perf_counter() - start)
+
+    # 每次都从空缓存开始完整分析
+    record["analyze"] = timed(image_mgr.analyze, args.repeat, setup=image_mgr._pipeline.clear)
+    record["bands_detected"] = len(image_mgr.results.live_bands)
+
+    rects = [tuple(band) for band in image_mgr._pipeline.run('measure').tolist()]
+    record["group_contours"] = timed(lambda: analysis.group_contours(rects), args.repeat)
+
+    live = image_mgr.results.live_bands
+    tags = list(zip(live['group'].tolist(), live['slot'].tolist()))[:args.contour_samples]
+
+    def change_contours():
+        for contour_tag in tags:
+            image_mgr.contour_changed(contour_tag)
+    record["contour_changed"] = timed(change_contours, args.repeat)
+    record["contour_changed"]["calls"] = len(tags)
+
+    sizes = iter([(1024, 640), (1088, 672)] * args.repeat)
+
+    def resize_window():
+        window.resize(*next(sizes))
+
+    def relayout():
+        image_mgr.update()
+        image_mgr._resize_image_label()
+    record["update_resize"] = timed(relayout, args.repeat, setup=resize_window)
+
+    def export():
+        write_results_csv(io.StringIO(), image_mgr.results, image_mgr.group_names, ColorNames())
+    record["export_csv"] = timed(export, args.repeat)
+    return record
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--megapixels', type=float, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--bands', type=int, nargs='+', default=[10, 100, 1000, 5000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--contour-samples', type=int, default=200,
+                        help="number of bands passed to contour_changed per repeat")
+    parser.add_argument('--overlay', choices=(OVERLAY_WIDGETS, OVERLAY_CANVAS), default=OVERLAY_WIDGETS)
+    parser.add_argument('--noise', type=float, default=6.0)
+    parser.add_argument('--smear', type=float, default=0.2)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-o', '--output', help="write all results with run metadata to this JSON file")
+    args = parser.parse_args(argv)
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    window = QMainWindow()
+    image_mgr = ImageManager(window)
+    image_mgr.set_overlay_mode(args.overlay)
+    window.setCentralWidget(image_mgr)
+    window.resize(1024, 640)
+    window.show()
+    app.processEvents()
+
+    results = []
+    for megapixels in args.megapixels:
+        for band_count in args.bands:
+            record = bench_case(window, image_mgr, megapixels, band_count, args)
+            app.processEvents()
+            print(json.dumps(record), flush=True)
+            results.append(record)
+    image_mgr.clean_data()
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({"meta": metadata(), "results": results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time   : 2026/10/20 15:40
+# @Author : yuyeqing
+# @File   : bench_sweep.py
+# @IDE    : PyCharm
+"""参数扫描耗时: 每个网格点重建流程串行运行, 与 run_sweep (复用前置阶段 + 进程池 + 共享图像) 对比
+
+python benchmarks/bench_sweep.py --megapixels 16 -j 4
+"""
+import os
+import sys
+import json
+import time
+import argparse
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.pipeline import AnalysisPipeline
+from core.sweep import DEFAULT_GRID, grid_points, run_sweep
+from synthetic import synthetic_gel, size_for_megapixels
+
+
+def naive_sweep(gray, grid):
+    counts = []
+    for fixed, inner_points in grid_points(grid):
+        for inner in inner_points:
+            groups = AnalysisPipeline(gray, **fixed, **inner).run()
+            counts.append(sum(len(group) for group in groups))
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--megapixels', type=float, default=16)
+    parser.add_argument('-j', '--workers', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    width, height = size_for_megapixels(args.megapixels)
+    gray = synthetic_gel(width, height)
+    start = time.perf_counter()
+    counts = naive_sweep(gray, DEFAULT_GRID)
+    naive_s = time.perf_counter() - start
+    start = time.perf_counter()
+    results = run_sweep(gray, DEFAULT_GRID, args.workers)
+    sweep_s = time.perf_counter() - start
+    if sorted(counts) != sorted(result.band_count for result in results):
+        raise AssertionError("run_sweep band counts differ from the naive sweep")
+    best = results[0]
+    print(json.dumps({
+        "shape": [height, width], "points": len(results), "naive_s": naive_s, "sweep_s": sweep_s,
+        "best": {"score": best.score, "bands": best.band_count, "params": best.params},
+    }))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time   : 2026/10/18 16:10
+# @Author : yuyeqing
+# @File   : synthetic.py
+# @IDE    : PyCharm
+"""确定性的合成凝胶图生成器, 相同参数与 seed 得到逐像素相同的图像
+
+python benchmarks/synthetic.py out.png --width 4000 --height 3000 --lanes 20 --bands-per-lane 12
+"""
+import argparse
+import cv2
+import numpy as np
+
+BACKGROUND = 230
+# 按行分块加噪声, 避免超大图一次生成整幅 float 噪声
+NOISE_CHUNK_ROWS = 1024
+
+
+def band_layout(width, height, lanes, bands_per_lane, seed=0):
+    """返回 (N, 5) 的 (x, y, w, h, 深度) 数组, 条带在泳道内纵向均匀分布并带随机抖动"""
+    rng = np.random.default_rng(seed)
+    lane_pitch = width / lanes
+    lane_width = max(1, int(lane_pitch * 0.6))
+    band_pitch = height * 0.8 / bands_per_lane
+    band_height = max(1, int(band_pitch * 0.4))
+    lane_idx, band_idx = np.divmod(np.arange(lanes * bands_per_lane), bands_per_lane)
+    x = (lane_idx * lane_pitch + (lane_pitch - lane_width) / 2).astype(np.int64)
+    jitter = rng.uniform(-0.15, 0.15, len(band_idx)) * band_pitch
+    y = (height * 0.1 + band_idx * band_pitch + jitter).astype(np.int64)
+    depth = rng.integers(60, 200, len(band_idx))
+    return np.column_stack((x, y, np.full_like(x, lane_width), np.full_like(x, band_height), depth))
+
+
+def synthetic_gel(width, height, lanes=12, bands_per_lane=10, noise=6.0, smear=0.0, seed=0):
+    """生成 uint8 灰度凝胶图
+
+    noise 为高斯噪声标准差; smear 为条带沿泳道方向拖尾的长度, 以条带间距为单位.
+    """
+    gel = np.full((height, width), BACKGROUND, np.uint8)
+    bands = band_layout(width, height, lanes, bands_per_lane, seed)
+    for x, y, w, h, depth in bands.tolist():
+        cv2.rectangle(gel, (x, y), (x + w - 1, y + h - 1), BACKGROUND - depth, cv2.FILLED)
+    band_pitch = height * 0.8 / bands_per_lane
+    smear_length = int(smear * band_pitch)
+    if smear_length > 1:
+        # 向下拖尾: 只沿纵向做均值模糊
+        gel = cv2.blur(gel, (1, smear_length), anchor=(0, 0))
+    # 条带边缘按条带高度做少量柔化
+    band_height = int(bands[0, 3]) if len(bands) else 1
+    gel = cv2.GaussianBlur(gel, (0, 0), min(3.0, max(0.5, band_height * 0.1)))
+    if noise > 0:
+        rng = np.random.default_rng(seed + 1)
+        for start in range(0, height, NOISE_CHUNK_ROWS):
+            rows = gel[start:start + NOISE_CHUNK_ROWS]
+            chunk = rows.astype(np.float32) + rng.standard_normal(rows.shape, np.float32) * noise
+            rows[:] = np.clip(chunk, 0, 255).astype(np.uint8)
+    return gel
+
+
+def size_for_megapixels(megapixels, aspect=4 / 3):
+    """按像素数和宽高比给出 (width, height)"""
+    height = int(round((megapixels * 1e6 / aspect) ** 0.5))
+    return int(round(height * aspect)), height
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('output', help="output image path")
+    parser.add_argument('--width', type=int, default=1600)
+    parser.add_argument('--height', type=int, default=1200)
+    parser.add_argument('--lanes', type=int, default=12)
+    parser.add_argument('--bands-per-lane', type=int, default=10)
+    parser.add_argument('--noise', type=float, default=6.0)
+    parser.add_argument('--smear', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    gel = synthetic_gel(args.width, args.height, args.lanes, args.bands_per_lane, args.noise, args.smear, args.seed)
+    cv2.imwrite(args.output, gel)
+
+
+if __name__ == '__main__':
+    main()
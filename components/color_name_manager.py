@@ -5,20 +5,13 @@
 # @File   : color_name_manager.py
 # @IDE    : PyCharm
 from share.consts import CONTOUR_COLOR_LIST
+from core.export import ColorNames
 from PyQt6.QtGui import QColor
 from PyQt6.QtWidgets import (QWidget, QHBoxLayout, QPushButton,
                              QFileDialog, QInputDialog, QMessageBox)
 from functools import partial
 
 
-class ColorNames(dict):
-
-    def __getitem__(self, idx):
-        if idx not in self:
-            self[idx] = f"Contour_{idx}"
-        return super().__getitem__(idx)
-
-
 class ColorNameManager(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent=parent)
@@ -42,13 +35,7 @@ class ColorNameManager(QWidget):
 
         # 获取最大轮廓数量
         if results:
-            available_contour_ids = list()
-            for group in results:
-                for contour_idx, contour_info in enumerate(group):
-                    if contour_idx in available_contour_ids:
-                        continue
-                    if contour_info is not None:
-                        available_contour_ids.append(contour_idx)
+            available_contour_ids = results.live_slots()
 
             # 创建新的颜色条
             for i in available_contour_ids:
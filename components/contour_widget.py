@@ -11,7 +11,7 @@ from PyQt6.QtWidgets import QWidget
 
 
 class ContourWidget(QWidget):
-    def __init__(self, parent=None, color_idx=0, contour_tag=None, changed_cb=None):
+    def __init__(self, parent=None, color_idx=0, contour_tag=None, changed_cb=None, finished_cb=None):
         super().__init__(parent=parent)
         self._rect = None
         self._color = None
@@ -21,6 +21,9 @@ class ContourWidget(QWidget):
         self.resizing = False
         self.resize_handle_size = 6
         self.changed_cb = changed_cb
+        self.finished_cb = finished_cb
+        # 上次摆放时使用的 (图像矩形, 缩放/偏移), 用于跳过无变化的重排
+        self.layout_key = None
 
     @property
     def position(self):
@@ -77,13 +80,18 @@ class ContourWidget(QWidget):
             self.setGeometry(self.x(), self.y(), new_width, new_height)
             self._rect.setSize(QSize(new_width, new_height))
             self.update()
+        else:
+            return
         if self.changed_cb:
             self.changed_cb(self.contour_tag)
 
     def mouseReleaseEvent(self, event):
         if event.button() == Qt.MouseButton.LeftButton:
+            moved = self.dragging or self.resizing
             self.dragging = False
             self.resizing = False
+            if moved and self.finished_cb:
+                self.finished_cb(self.contour_tag)
 
     def is_on_resize_handle(self, pos):
         handle_rect = QRect(self.width() - self.resize_handle_size,
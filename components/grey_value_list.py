@@ -4,10 +4,10 @@
 # @Author : yuyeqing
 # @File   : grey_value_list.py
 # @IDE    : PyCharm
-from share.resource import resource_path
+from share.resource import cached_icon
 from functools import partial
 from share.consts import CONTOUR_COLOR_LIST
-from PyQt6.QtGui import QColor, QIcon
+from PyQt6.QtGui import QColor
 from PyQt6.QtWidgets import QWidget, QLabel, QPushButton
 
 
@@ -20,35 +20,49 @@ class GreyValueList(QWidget):
         self.add_cb = add_cb
         self.group_idx = group_idx
         self.add_button = QPushButton(self)
-        self.add_button.setIcon(QIcon(resource_path('assets/add.ico')))
+        self.add_button.setIcon(cached_icon('assets/add.ico'))
         self.add_button.clicked.connect(self.on_add)
         self.add_button.resize(17, 17)
 
     def update_values(self, group_result):
-        # 清空旧的 QLabel
-        for label in self.labels:
-            label.deleteLater()
-        for button in self.buttons:
-            if button:
-                button.deleteLater()
-        self.labels.clear()
-        self.buttons.clear()
+        # 删除多余的 QLabel
+        for idx in range(len(group_result), len(self.labels)):
+            self._remove_entry(idx)
+        del self.labels[len(group_result):]
+        del self.buttons[len(group_result):]
         for idx, contour_info in enumerate(group_result):
-            if contour_info is None:
+            if idx >= len(self.labels):
                 self.labels.append(None)
                 self.buttons.append(None)
+            if contour_info is None:
+                self._remove_entry(idx)
+                continue
+            label = self.labels[idx]
+            if label is not None:
+                # 复用已有的 QLabel, 只更新数值
+                label.setText(f"{contour_info[-1]}")
                 continue
             rgba = CONTOUR_COLOR_LIST[idx % len(CONTOUR_COLOR_LIST)]
             color = QColor(rgba[0], rgba[1], rgba[2], rgba[3])
             label = QLabel(f"{contour_info[-1]}", self)
             label.setStyleSheet(f"color: rgb({color.red()}, {color.green()}, {color.blue()});")
-            self.labels.append(label)
+            label.show()
+            self.labels[idx] = label
             button = QPushButton(self)
-            button.setIcon(QIcon(resource_path('assets/delete.ico')))
+            button.setIcon(cached_icon('assets/delete.ico'))
             button.clicked.connect(partial(self.on_delete, idx))
-            self.buttons.append(button)
+            button.show()
+            self.buttons[idx] = button
         self.refresh_labels_and_buttons()
 
+    def _remove_entry(self, idx):
+        if self.labels[idx]:
+            self.labels[idx].deleteLater()
+            self.labels[idx] = None
+        if self.buttons[idx]:
+            self.buttons[idx].deleteLater()
+            self.buttons[idx] = None
+
     def refresh_labels_and_buttons(self):
         y_offset = 0
         y_steps = 20
@@ -75,12 +89,7 @@ class GreyValueList(QWidget):
         if self.delete_cb:
             contour_tag = (self.group_idx, label_idx)
             self.delete_cb(contour_tag)
-        if self.labels[label_idx]:
-            self.labels[label_idx].deleteLater()
-            self.labels[label_idx] = None
-        if self.buttons[label_idx]:
-            self.buttons[label_idx].deleteLater()
-            self.buttons[label_idx] = None
+        self._remove_entry(label_idx)
         self.refresh_labels_and_buttons()
 
     def on_add(self):
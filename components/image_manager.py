@@ -4,36 +4,77 @@
 # @Author : yuyeqing
 # @File   : image_manager.py
 # @IDE    : PyCharm
-import cv2
+import os
+import multiprocessing
 import numpy as np
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QTimer, QRect, QThreadPool, pyqtSignal
 from PyQt6.QtGui import QPixmap, QImage
-from PyQt6.QtWidgets import QWidget, QLabel, QMessageBox, QVBoxLayout, QSizePolicy
+from PyQt6.QtWidgets import QWidget, QLabel, QMessageBox, QSizePolicy
+from core import analysis
+from core.pipeline import DEFAULT_PARAMS
+from core.profiling import PROFILER
+from core.loaded_image import LoadedImage, LOAD_STAGES, TILED_ANALYSIS_PIXELS
+from core.band_table import BandTable, RECT_FIELDS
+from core import result_cache
+from core.session import ImageSession, SessionEntry
+from core.project import Project, load_project, save_project
+from core.shared_image import SharedImage
+from core.sweep import run_sweep, sweep_stages
+from core.template import LayoutTemplate, apply_template
+from core.export import ColorNames, write_stack_csv
+from share.consts import OVERLAY_WIDGETS, OVERLAY_CANVAS
 from components.contour_widget import ContourWidget
+from components.overlay_canvas import OverlayCanvas
 from components.grey_value_list import GreyValueList
 from components.group_name_widget import GroupNameWidget
+from components.tasks import Task
 
 
 class ImageManager(QWidget):
-    def __init__(self, parent=None, contour_changed_cb=None):
+    PIXMAP_CACHE_SIZE = 8
+    # 超过该像素数时使用分块多线程二值化
+    TILED_ANALYSIS_PIXELS = TILED_ANALYSIS_PIXELS
+    # 后台任务名 ('load' / 'analyze'), 当前步骤, 已完成步骤数, 总步骤数
+    task_progress = pyqtSignal(str, str, int, int)
+    # 任务结束或被取消
+    task_finished = pyqtSignal(str)
+    task_failed = pyqtSignal(str, str)
+    # 参数扫描完成, 按分数降序的 SweepResult 列表
+    sweep_finished = pyqtSignal(object)
+    # 布局模板已套用到图像序列: CSV 路径, 图像数
+    template_applied = pyqtSignal(str, int)
+
+    def __init__(self, parent=None, contour_changed_cb=None, cache=None):
         super().__init__(parent=parent)
         self.gray = None
         self.original_image = None
+        # 为 True 时 load_image 直接解码为单通道灰度图, 不保留 BGR 原图
+        self.grayscale_only = False
         self.contour_changed_cb = contour_changed_cb
-        self.results = []
+        self.results = BandTable()
+        # 结果缓存: 检测结果与当前(可能已手动编辑的)结果分开保存
+        self.cache = cache
+        self._image_hash = None
+        self._detected = None
+        # 当前结果对应的缓存键, 载入新图像时背景阈值会先于 clean_data 改变
+        self._result_key = None
         self.image_position_ratio = 0.2
         self.image_label = QLabel(self)
         self.image_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.image_label.setSizePolicy(QSizePolicy.Policy.Fixed, QSizePolicy.Policy.Fixed)
-        self.image_label.setScaledContents(True)
+        # 显示图由金字塔按标签尺寸生成, 无需 QLabel 再缩放
+        self.image_label.setScaledContents(False)
 
-        # 创建布局并添加 QLabel
-        layout = QVBoxLayout()
-        layout.addWidget(self.image_label)
-        self.setLayout(layout)
+        # QLabel 由 _resize_image_label 手动摆放, 不加入布局, 避免 pixmap 尺寸反过来撑大窗口
 
         # 记录绘制contours obj
         self.contour_objs: dict[tuple[int, int], ContourWidget] = dict()
+        # 单画布模式: 所有条带框由一个控件绘制
+        self.overlay_mode = OVERLAY_WIDGETS
+        self.overlay_canvas = OverlayCanvas(self, changed_cb=self.schedule_contour_changed,
+                                            finished_cb=self.finish_contour_changed,
+                                            delete_cb=self.contour_delete)
+        self.overlay_canvas.hide()
 
         # 记录组名 obj
         self._group_names = dict()
@@ -41,11 +82,33 @@ class ImageManager(QWidget):
 
         # 记录灰度值列表 obj
         self.grey_value_list_objs: dict[int, GreyValueList] = dict()
-        self._background_threshold = 0
+        # 分阶段缓存的分析流程, 随图像重建; analysis_params 为用户修改过的参数, 对之后载入的图像同样生效
+        self._pipeline = None
+        self.analysis_params = dict()
+        # 当前显示的 LoadedImage; 同一文件夹内的其他图像及其结果由会话保留, 解码数据按内存预算缓存
+        self._loaded = None
+        self.session = ImageSession()
+        # 发布给工作进程的灰度图, 见 shared_gray; 换图时释放
+        self._shared_image = None
 
         self.scale_factor = 1.0
         self.offset = (0, 0)
 
+        # 拖动/缩放时的重算请求按 contour_tag 合并, 每帧最多执行一次
+        self._pending_contour_tags = dict()
+        self._contour_update_timer = QTimer(self)
+        self._contour_update_timer.setSingleShot(True)
+        self._contour_update_timer.timeout.connect(self._flush_contour_changes)
+
+        # 后台载入/分析任务, 只保留最新的一个
+        self._load_task = None
+        self._analyze_task = None
+        self._analyze_after_load = False
+        self._sweep_task = None
+        self._template_task = None
+        # 相邻图像的预读任务, path -> Task
+        self._prefetch_tasks: dict[str, Task] = dict()
+
     @property
     def group_names(self):
         return self._group_names
@@ -54,11 +117,21 @@ class ImageManager(QWidget):
         self._group_names[group_idx] = name
 
     def clean_data(self):
+        # 清空前先保存当前图像的编辑结果, 会话内切回时直接恢复
+        self.save_cached_results()
+        if self.session.current is not None and self._detected is not None:
+            self.session.entries[self.session.current] = SessionEntry(
+                self._detected, self.results, dict(self._group_names), self._result_key)
         # 清空所有现有数据
+        self._contour_update_timer.stop()
+        self._pending_contour_tags.clear()
+        self._detected = None
+        self._result_key = None
         self._group_names.clear()
         for _, contour in self.contour_objs.items():
             contour.deleteLater()
         self.contour_objs.clear()
+        self.overlay_canvas.clear()
         for _, grey_value_list in self.grey_value_list_objs.items():
             grey_value_list.deleteLater()
         self.grey_value_list_objs.clear()
@@ -66,185 +139,628 @@ class ImageManager(QWidget):
             group_name.deleteLater()
         self.group_name_objs.clear()
         self.image_label.clear()
-        self.results.clear()
+        # 扫描结果只对当前图像有意义, 取消后工作进程挂接失败也不会报告
+        self._cancel_task(self._sweep_task)
+        self._sweep_task = None
+        self.release_shared_gray()
+        # 旧结果已交给会话保存, 不能原地清空
+        self.results = BandTable()
+
+    def shared_gray(self):
+        """把当前灰度图发布给工作进程, 返回可 pickle 的 SharedImageHandle; 同一图像只复制一次"""
+        if self.gray is None:
+            return None
+        if self._shared_image is None:
+            self._shared_image = SharedImage(self.gray)
+        return self._shared_image.handle
+
+    def release_shared_gray(self):
+        if self._shared_image is not None:
+            self._shared_image.close()
+            self._shared_image = None
 
     def load_image(self, image_path):
+        """在当前线程同步载入, 界面中使用 load_image_async"""
         if not image_path:
             return
-        self.original_image = cv2.imread(image_path)
-        if self.original_image is None:
-            QMessageBox.warning(self, "Error", "Failed to load image. Please check the file path.")
+        image_path = self.session.open_folder_of(image_path)
+        with PROFILER.stage('load_image'):
+            try:
+                loaded = self._image_loader(image_path)(None)
+            except ValueError as e:
+                QMessageBox.warning(self, "Error", str(e))
+                return
+            self.show_image(loaded)
+
+    def _image_loader(self, image_path):
+        """在界面线程读取当前设置, 返回可在工作线程执行的载入函数 loader(progress)"""
+        grayscale_only = self.grayscale_only
+        options = dict(with_hash=self.cache is not None, analysis_params=dict(self.analysis_params),
+                       tile_pixels=self.TILED_ANALYSIS_PIXELS)
+
+        def loader(progress):
+            return LoadedImage.from_file(image_path, grayscale_only, progress, **options)
+        return loader
+
+    def set_image(self, gray, original_image=None):
+        """显示已解码的图像; original_image 为空时显示数据由灰度图生成"""
+        self.show_image(LoadedImage(gray, original_image, with_hash=self.cache is not None,
+                                    analysis_params=self.analysis_params, tile_pixels=self.TILED_ANALYSIS_PIXELS))
+
+    def show_image(self, loaded):
+        """切换到已构建好的 LoadedImage, 只在界面线程调用"""
+        self.original_image = loaded.original_image
+        self.gray = loaded.gray
+        self.clean_data()
+        self._loaded = loaded
+        self._image_hash = loaded.image_hash
+        # 缓存或预读的图像按构建时的参数建立流程, 之后修改过的分析参数同样生效
+        loaded.pipeline.set_params(**self.analysis_params)
+        self._pipeline = loaded.pipeline
+        self.session.current = loaded.path
+        if loaded.path is not None:
+            self.session.cache.put(loaded.path, loaded, keep=loaded.path)
+        print(f"Image loaded successfully. Shape: {self.gray.shape}, dtype: {self.gray.dtype}, "
+              f"background threshold: {self.background_threshold}")
+        if self._restore_session_entry() or self._restore_cached_results():
+            self.update()
+        self._resize_image_label()
+
+    def load_image_async(self, image_path):
+        """在线程池中解码并构建派生数据, 正在进行的载入和分析都会被取消"""
+        if not image_path:
             return
-        self.gray = cv2.cvtColor(self.original_image, cv2.COLOR_BGR2GRAY)
-        self._background_threshold = self._estimate_background_threshold()
-        h, w, ch = self.original_image.shape
-        if ch != 3:
-            QMessageBox.warning(self, "Error", "Unsupported image format. Only RGB images are supported.")
-            self.original_image = None
-            self.gray = None
+        self.cancel_tasks()
+        image_path = self.session.open_folder_of(image_path)
+        loaded = self.session.cache.get(image_path)
+        if loaded is not None and (loaded.original_image is None) == self.grayscale_only:
+            self.show_image(loaded)
+            self.task_finished.emit('load')
+            self._prefetch_neighbors()
             return
-        self.clean_data()
-        print(f"Image loaded successfully. Shape: {self.original_image.shape}, "
-              f"background threshold: {self._background_threshold}")
+        task = self._prefetch_tasks.pop(image_path, None)
+        if task is not None:
+            # 正在预读的图像直接转为当前载入任务, 完成后由 _on_prefetch_finished 转交
+            task.signals.progress.connect(
+                lambda stage, done, total: self.task_progress.emit('load', stage, done, total))
+            self._load_task = task
+            return
+        loader = self._image_loader(image_path)
+
+        def work(progress):
+            with PROFILER.stage('load_image'):
+                return loader(progress)
+        task = Task('load', work, LOAD_STAGES)
+        task.signals.finished.connect(lambda loaded: self._on_load_finished(task, loaded))
+        self._load_task = self._start_task(task)
+
+    def _on_load_finished(self, task, loaded):
+        if task is not self._load_task:
+            return
+        self._load_task = None
+        self.show_image(loaded)
+        self.task_finished.emit('load')
+        if self._analyze_after_load:
+            self._analyze_after_load = False
+            self.analyze_async()
+        self._prefetch_neighbors()
+
+    def save_project(self, path, color_names, embed_image=True):
+        """保存当前结果、组名与颜色名; 内嵌同一灰度图时再次保存只重写条带表与索引"""
+        project = Project(self.results, self._detected, self._group_names, color_names, self.session.current,
+                          self.gray, self._image_hash, self.analysis_params)
+        save_project(path, project, embed_image)
+        # 保存时已计算过哈希, 之后无需重复计算
+        self._image_hash = project.image_hash
+
+    def load_project_async(self, path):
+        """打开项目文件, 返回其中的 Project 供调用方恢复颜色名; 无法打开时提示并返回 None
+
+        内嵌的灰度图以内存映射方式交给 LoadedImage, 不需要解码; 未内嵌时按记录的路径重新载入.
+        """
+        self.cancel_tasks()
+        try:
+            project = load_project(path)
+            if project.gray is None and not project.image_path:
+                raise ValueError("The project does not reference an image.")
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(self, "Error", str(e))
+            return None
+        self.analysis_params.update(project.analysis_params)
+        image_path = project.image_path and self.session.open_folder_of(project.image_path)
+        if project.gray is None:
+            loader = self._image_loader(image_path)
+        else:
+            options = dict(analysis_params=dict(self.analysis_params), tile_pixels=self.TILED_ANALYSIS_PIXELS)
+
+            def loader(progress):
+                loaded = LoadedImage(project.gray, None, image_path, progress=progress, **options)
+                loaded.image_hash = project.image_hash
+                return loaded
+
+        def work(progress):
+            with PROFILER.stage('load_project'):
+                return loader(progress)
+        task = Task('load', work, LOAD_STAGES)
+        task.signals.finished.connect(lambda loaded: self._on_project_loaded(task, project, loaded))
+        self._load_task = self._start_task(task)
+        return project
+
+    def _on_project_loaded(self, task, project, loaded):
+        if task is not self._load_task:
+            return
+        self._load_task = None
+        self.show_image(loaded)
+        # 项目中的结果优先于会话与结果缓存
+        self._result_key = self._cache_key()
+        self._detected = project.detected if project.detected is not None else project.results.copy()
+        self.results = project.results
+        self._group_names.clear()
+        self._group_names.update(project.group_names)
+        self.update()
         self._resize_image_label()
-        q_img = QImage(self.original_image.data, w, h, ch * w, QImage.Format.Format_BGR888)
-        pixmap = QPixmap.fromImage(q_img).scaled(
-            self.image_label.size(),
-            Qt.AspectRatioMode.KeepAspectRatio,
-            Qt.TransformationMode.SmoothTransformation
-        )
-        self.image_label.setPixmap(pixmap)
+        self.task_finished.emit('load')
+        self._prefetch_neighbors()
+
+    def show_next(self):
+        self.show_neighbor(1)
+
+    def show_previous(self):
+        self.show_neighbor(-1)
+
+    def show_neighbor(self, step):
+        """切换到会话中前/后第 step 张图像"""
+        path = self.session.neighbor(step)
+        if path is not None:
+            self.load_image_async(path)
+
+    def set_cache_budget(self, budget_bytes):
+        self.session.cache.budget_bytes = budget_bytes
+        self.session.cache.trim(keep=self.session.current)
+
+    def _prefetch_neighbors(self):
+        """在线程池中预读当前图像前后相邻的图像, 已缓存的跳过, 不再相邻的预读任务取消"""
+        neighbors = self.session.neighbors()
+        for path in list(self._prefetch_tasks):
+            if path not in neighbors:
+                self._prefetch_tasks.pop(path).cancel()
+        for path in neighbors:
+            if path in self.session.cache or path in self._prefetch_tasks:
+                continue
+            loader = self._image_loader(path)
+
+            def work(progress, loader=loader):
+                with PROFILER.stage('prefetch'):
+                    return loader(progress)
+            task = Task('prefetch', work, LOAD_STAGES)
+            task.signals.finished.connect(lambda loaded, path=path, task=task: self._on_prefetch_finished(path, task, loaded))
+            task.signals.failed.connect(lambda message, path=path, task=task: self._on_prefetch_failed(path, task, message))
+            self._prefetch_tasks[path] = task
+            QThreadPool.globalInstance().start(task)
+
+    def _on_prefetch_finished(self, path, task, loaded):
+        if task is self._load_task:
+            self._on_load_finished(task, loaded)
+            return
+        if self._prefetch_tasks.get(path) is not task:
+            return
+        del self._prefetch_tasks[path]
+        self.session.cache.put(path, loaded, keep=self.session.current)
+
+    def _on_prefetch_failed(self, path, task, message):
+        if task is self._load_task:
+            self._on_task_failed(task, message)
+        elif self._prefetch_tasks.get(path) is task:
+            # 预读失败不提示, 真正切换到该图像时再报告
+            del self._prefetch_tasks[path]
+
+    def cancel_prefetch(self):
+        for task in self._prefetch_tasks.values():
+            task.cancel()
+        self._prefetch_tasks.clear()
+
+    def analyze_async(self):
+        """在线程池中运行分析流程; 载入尚未完成时等载入结束后再分析"""
+        if self._load_task is not None:
+            self._analyze_after_load = True
+            return
+        if self._pipeline is None:
+            return
+        self._cancel_task(self._analyze_task)
+        self._analyze_task = None
+        # 缓存只在界面线程访问
+        key = self._cache_key()
+        cached = self.cache.load(key) if key else None
+        if cached is not None:
+            self._show_detected(key, cached[0])
+            self.task_finished.emit('analyze')
+            return
+        pipeline = self._pipeline
+        # 工作线程运行副本, 界面线程的 pipeline 只在结果被采用时合并
+        worker = pipeline.copy()
+
+        def work(progress):
+            with PROFILER.stage('analyze'):
+                return BandTable.from_groups(worker.run(progress=progress))
+        task = Task('analyze', work, worker.stage_names())
+        task.signals.finished.connect(
+            lambda detected: self._on_analyze_finished(task, pipeline, worker, key, detected))
+        self._analyze_task = self._start_task(task)
+
+    def _on_analyze_finished(self, task, pipeline, worker, key, detected):
+        if task is not self._analyze_task:
+            return
+        self._analyze_task = None
+        # 换了图像或提交后又改过参数, 结果已经过期
+        if pipeline is not self._pipeline or worker.params != pipeline.params or key != self._cache_key():
+            return
+        pipeline.merge(worker)
+        self._show_detected(key, detected)
+        self.task_finished.emit(task.name)
+
+    def sweep_async(self, grid=None, workers=None):
+        """在进程池中扫描分析参数网格 (见 core.sweep), 完成后发出 sweep_finished; 不修改当前参数和结果"""
+        if self.gray is None:
+            return
+        self._cancel_task(self._sweep_task)
+        handle = self.shared_gray()
+
+        def work(progress):
+            with PROFILER.stage('sweep'):
+                # 界面进程中的线程较多, 工作进程用 spawn 启动
+                return run_sweep(handle, grid, workers, multiprocessing.get_context('spawn'), progress)
+        task = Task('sweep', work, sweep_stages(grid))
+        task.signals.finished.connect(lambda results: self._on_sweep_finished(task, results))
+        self._sweep_task = self._start_task(task)
+
+    def _on_sweep_finished(self, task, results):
+        if task is not self._sweep_task:
+            return
+        self._sweep_task = None
+        self.task_finished.emit(task.name)
+        self.sweep_finished.emit(results)
+
+    def apply_analysis_params(self, params):
+        """应用扫描选出的参数并在后台重新分析"""
+        self.set_analysis_params(**params)
+        # 尚未分析过时 set_analysis_params 只修改参数
+        if self._detected is None and self._analyze_task is None:
+            self.analyze_async()
+
+    def layout_template(self):
+        """当前 (含手动编辑的) 条带框和组名作为布局模板"""
+        return LayoutTemplate.from_results(self.results, self._group_names, self.gray.shape)
+
+    def apply_template_async(self, template, image_paths, csv_path, color_names):
+        """在线程池中把模板套用到一组对齐的图像, 写出每张图像一列的宽表 CSV; 使用当前的分析参数估计背景"""
+        self._cancel_task(self._template_task)
+        params = dict(DEFAULT_PARAMS, **self.analysis_params)
+        anydepth = self.grayscale_only
+        # 颜色名在导出时会补全, 复制一份避免在工作线程修改界面的数据
+        color_names = ColorNames(color_names)
+
+        def work(progress):
+            with PROFILER.stage('template'):
+                values = apply_template(template, image_paths, anydepth, params['background_threshold'],
+                                        params['background_offset_ratio'], progress)
+            with open(csv_path, 'w', newline='') as csvfile:
+                write_stack_csv(csvfile, template.results, values, [os.path.basename(p) for p in image_paths],
+                                template.group_names, color_names)
+            return values
+        task = Task('template', work, image_paths)
+        task.signals.finished.connect(lambda values: self._on_template_finished(task, csv_path, len(values)))
+        self._template_task = self._start_task(task)
+
+    def cancel_template(self):
+        """模板任务与当前图像无关, 换图时不取消, 只在退出时取消"""
+        if self._template_task is not None:
+            self._template_task.cancel()
+            self._template_task = None
+            self.task_finished.emit('template')
+
+    def _on_template_finished(self, task, csv_path, image_count):
+        if task is not self._template_task:
+            return
+        self._template_task = None
+        self.task_finished.emit(task.name)
+        self.template_applied.emit(csv_path, image_count)
+
+    def _start_task(self, task):
+        task.signals.progress.connect(lambda stage, done, total: self.task_progress.emit(task.name, stage, done, total))
+        task.signals.failed.connect(lambda message: self._on_task_failed(task, message))
+        QThreadPool.globalInstance().start(task)
+        return task
+
+    def _on_task_failed(self, task, message):
+        if task is self._load_task:
+            self._load_task = None
+            self._analyze_after_load = False
+        elif task is self._analyze_task:
+            self._analyze_task = None
+        elif task is self._sweep_task:
+            self._sweep_task = None
+        elif task is self._template_task:
+            self._template_task = None
+        else:
+            return
+        self.task_failed.emit(task.name, message)
+        QMessageBox.warning(self, "Error", message)
+
+    @staticmethod
+    def _cancel_task(task):
+        if task is not None:
+            task.cancel()
+
+    def cancel_tasks(self):
+        """取消正在进行的载入与分析, 已取消任务的结果会被丢弃"""
+        for name, task in (('load', self._load_task), ('analyze', self._analyze_task), ('sweep', self._sweep_task)):
+            if task is not None:
+                task.cancel()
+                self.task_finished.emit(name)
+        self._load_task = None
+        self._analyze_task = None
+        self._sweep_task = None
+        self._analyze_after_load = False
+
+    def _cache_key(self):
+        if self.cache is None or self._image_hash is None:
+            return None
+        return result_cache.cache_key(self._image_hash, self._pipeline.resolved_params())
+
+    def _restore_session_entry(self):
+        """本次会话中显示过该图像且分析参数未变时恢复离开时的结果"""
+        entry = self.session.entries.get(self.session.current)
+        if entry is None or entry.result_key != self._cache_key():
+            return False
+        self._result_key = entry.result_key
+        self._detected = entry.detected
+        self.results = entry.results
+        self._group_names.update(entry.group_names)
+        return True
+
+    def _restore_cached_results(self):
+        """之前分析过同一图像时恢复检测结果、手动编辑和组名"""
+        key = self._cache_key()
+        cached = self.cache.load(key) if key else None
+        if cached is None:
+            return False
+        self._result_key = key
+        self._detected, self.results, group_names = cached
+        self._group_names.update(group_names)
+        return True
+
+    def save_cached_results(self):
+        if self.cache is None or self._result_key is None or self._detected is None:
+            return
+        self.cache.store(self._result_key, self._detected, self.results, self._group_names)
+
+    def _scaled_pixmap(self, width, height):
+        """按显示尺寸取缩放后的 QPixmap, 最近使用的若干尺寸缓存复用"""
+        key = (width, height)
+        display_cache = self._loaded.display_cache
+        pixmap = display_cache.get(key)
+        if pixmap is not None:
+            display_cache.move_to_end(key)
+            return pixmap
+        with PROFILER.stage('scale'):
+            image = self._loaded.pyramid.render(width, height)
+            h, w = image.shape[:2]
+            if image.ndim == 3:
+                image_format = QImage.Format.Format_BGR888
+            elif image.dtype == np.uint16:
+                image_format = QImage.Format.Format_Grayscale16
+            else:
+                image_format = QImage.Format.Format_Grayscale8
+            q_img = QImage(image.data, w, h, image.strides[0], image_format)
+            pixmap = QPixmap.fromImage(q_img)
+        display_cache[key] = pixmap
+        self._loaded.display_bytes[key] = pixmap.width() * pixmap.height() * 4
+        if len(display_cache) > self.PIXMAP_CACHE_SIZE:
+            old_key, _ = display_cache.popitem(last=False)
+            self._loaded.display_bytes.pop(old_key, None)
+        self.session.cache.trim(keep=self.session.current)
+        return pixmap
+
+    def _refresh_pixmap(self):
+        if self._loaded is None or self.image_label.width() <= 0 or self.image_label.height() <= 0:
+            return
+        self.image_label.setPixmap(self._scaled_pixmap(self.image_label.width(), self.image_label.height()))
 
     def resizeEvent(self, event):
         super().resizeEvent(event)
+        self.overlay_canvas.setGeometry(self.rect())
         self.update()
         self._resize_image_label()
 
     def analyze(self):
-        blurred = cv2.GaussianBlur(self.gray, (5, 5), 0)
-        _, thresh = cv2.threshold(blurred, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
-        kernel = np.ones((3, 3), np.uint8)
-        opening = cv2.morphologyEx(thresh, cv2.MORPH_OPEN, kernel, iterations=2)
-        contours, _ = cv2.findContours(opening, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-
-        rects = []
-        for contour in contours:
-            x, y, w, h = cv2.boundingRect(contour)
-            roi = self.gray[y:y+h, x:x+w]
-
-            # Apply threshold to eliminate white areas more strictly
-            _, roi_thresh = cv2.threshold(roi, self._background_threshold,
-                                          255, cv2.THRESH_BINARY_INV)  # Lower threshold to eliminate more white areas
-            gray_integral = np.sum(roi_thresh)  # Calculate integral on thresholded ROI
-
-            rects.append((x, y, w, h, gray_integral))
-
-        self.results = self.group_contours(rects)
+        """在当前线程同步分析, 界面中使用 analyze_async"""
+        with PROFILER.stage('analyze'):
+            # 重新分析会丢弃手动编辑, 检测结果优先取自缓存
+            key = self._cache_key()
+            cached = self.cache.load(key) if key else None
+            self._show_detected(key, cached[0] if cached is not None else BandTable.from_groups(self._pipeline.run()))
+
+    def _show_detected(self, key, detected):
+        self._result_key = key
+        self._detected = detected
+        self.results = detected.copy()
         self.update()
         self._resize_image_label()
+        self.save_cached_results()
+
+    def set_analysis_params(self, **params):
+        """修改分析参数 (见 pipeline.DEFAULT_PARAMS), 已分析过或正在分析时取消旧任务并在后台重新分析,
+        只重算受影响的阶段
+        """
+        analyzing = self._detected is not None or self._analyze_task is not None
+        self._cancel_task(self._analyze_task)
+        self._analyze_task = None
+        self.analysis_params.update(params)
+        if self._pipeline is None:
+            return
+        # 旧参数下的编辑结果先写入缓存
+        self.save_cached_results()
+        self._pipeline.set_params(**params)
+        if analyzing:
+            self.analyze_async()
 
-    def _estimate_background_threshold(self):
-        # 计算图像的直方图
-        histogram = cv2.calcHist([self.gray], [0], None, [256], [0, 256])
-        histogram = histogram.ravel()  # 将直方图转换为一维数组
-
-        # 找到直方图中最大值的索引
-        max_index = np.argmax(histogram)
-        # 选择最大值索引前10%的灰度值作为阈值
-        threshold = max_index - int(0.1 * len(histogram))
+    @property
+    def loading(self):
+        return self._load_task is not None
 
-        # 确保阈值在有效范围内
-        threshold = max(0, min(threshold, 255))
+    @property
+    def background_threshold(self):
+        return self._pipeline.background_threshold if self._pipeline else 0
 
-        return threshold
+    def _ensure_integrator(self):
+        """积分图由 pipeline 按当前背景阈值缓存, 阈值不变时复用"""
+        return self._pipeline.integrator()
 
     def group_contours(self, rects):
-        sorted_rects = sorted(rects, key=lambda r: (r[0], r[1]))  # Sort by x, then y
-
-        def is_same_group(group_rects, find_rect):
-            for rc in group_rects:
-                if max(rc[0] + rc[2], find_rect[0] + find_rect[2]) - min(rc[0], find_rect[0]) < rc[2] + find_rect[2]:
-                    return True
-            return False
-
-        groups: list[list] = []
-        for rect in sorted_rects:
-            if not groups:
-                groups.append([rect, ])
-            else:
-                for group in groups:
-                    if is_same_group(group, rect):
-                        group.append(rect)
-                        break
-                else:
-                    groups.append([rect, ])
-        for group_idx, group in enumerate(groups):
-            groups[group_idx] = sorted(group, key=lambda r: r[1])
-        return groups
+        return analysis.group_contours(rects)
 
-    def update(self):
-        self.update_position()
-        self._calculate_scale_offset()
-        # Clear old contours
+    def set_overlay_mode(self, mode):
+        """切换条带框的绘制方式: 每个条带一个控件, 或单画布统一绘制"""
+        if mode not in (OVERLAY_WIDGETS, OVERLAY_CANVAS) or mode == self.overlay_mode:
+            return
+        self._flush_contour_changes()
+        self.overlay_mode = mode
         for _, contour in self.contour_objs.items():
             contour.deleteLater()
         self.contour_objs.clear()
-        # Create new contour objects
-        for group_idx, group in enumerate(self.results):
-            for idx, child in enumerate(group):
-                if child is None:
-                    continue
-                contour_tag = (group_idx, idx)
+        self.overlay_canvas.clear()
+        self.overlay_canvas.setVisible(mode == OVERLAY_CANVAS)
+        self.overlay_canvas.setGeometry(self.rect())
+        self.update()
+        self._resize_image_label()
+
+    def update(self):
+        with PROFILER.stage('update'):
+            self.update_position()
+            self._calculate_scale_offset()
+            if self.overlay_mode == OVERLAY_CANVAS:
+                self._update_canvas()
+            else:
+                self._update_contour_widgets()
+            self.init_group_names()
+            self.init_grey_value_list()
+
+    def _update_canvas(self):
+        live = self.results.live_bands
+        win_x = (live['x'] * self.scale_factor + self.offset[0]).astype(np.int64)
+        win_y = (live['y'] * self.scale_factor + self.offset[1]).astype(np.int64)
+        win_w = (live['w'] * self.scale_factor).astype(np.int64)
+        win_h = (live['h'] * self.scale_factor).astype(np.int64)
+        bands = {(group_idx, idx): QRect(x, y, w, h) for group_idx, idx, x, y, w, h in
+                 zip(live['group'].tolist(), live['slot'].tolist(),
+                     win_x.tolist(), win_y.tolist(), win_w.tolist(), win_h.tolist())}
+        self.overlay_canvas.set_bands(bands)
+
+    def _update_contour_widgets(self):
+        layout = (self.scale_factor, self.offset)
+        live_tags = set()
+        live = self.results.live_bands
+        for group_idx, idx, *child in zip(live['group'].tolist(), live['slot'].tolist(),
+                                          *(live[field].tolist() for field in RECT_FIELDS)):
+            contour_tag = (group_idx, idx)
+            live_tags.add(contour_tag)
+            contour = self.contour_objs.get(contour_tag)
+            if contour is None:
                 contour = ContourWidget(self, contour_tag=contour_tag,
-                                        changed_cb=self.contour_changed)
-                contour.set_rect(child[2] * self.scale_factor, child[3] * self.scale_factor)
+                                        changed_cb=self.schedule_contour_changed,
+                                        finished_cb=self.finish_contour_changed)
                 contour.color = idx
-                # Correctly position the contour using image to window conversion
-                win_x, win_y = self.image_to_window_coord(child[0], child[1])
-                contour.position = (win_x, win_y)
+                self._place_contour(contour, child, layout)
                 self.contour_objs[contour_tag] = contour
                 contour.show()
-        self.init_group_names()
-        self.init_grey_value_list()
-    
-    def contour_changed(self, contour_tag):
+            else:
+                self._place_contour(contour, child, layout)
+        # 只销毁已经不存在的条带
+        for contour_tag in list(self.contour_objs.keys()):
+            if contour_tag not in live_tags:
+                self.contour_objs.pop(contour_tag).deleteLater()
+
+    def _place_contour(self, contour, child, layout):
+        # 图像坐标与缩放/偏移都没变化时无需重新摆放
+        layout_key = (tuple(child[:4]), layout)
+        if contour.layout_key == layout_key:
+            return
+        contour.layout_key = layout_key
+        contour.set_rect(child[2] * self.scale_factor, child[3] * self.scale_factor)
+        # Correctly position the contour using image to window conversion
+        win_x, win_y = self.image_to_window_coord(child[0], child[1])
+        contour.position = (win_x, win_y)
+
+    def _frame_interval(self):
+        screen = self.screen()
+        refresh_rate = screen.refreshRate() if screen else 0
+        if refresh_rate <= 0:
+            refresh_rate = 60
+        return max(1, int(1000 / refresh_rate))
+
+    def schedule_contour_changed(self, contour_tag):
+        """只保留每个 contour_tag 最新的请求, 在下一帧统一重算"""
+        self._pending_contour_tags[contour_tag] = None
+        if not self._contour_update_timer.isActive():
+            self._contour_update_timer.start(self._frame_interval())
+
+    def _flush_contour_changes(self):
+        pending = list(self._pending_contour_tags)
+        self._pending_contour_tags.clear()
+        for contour_tag in pending:
+            self.contour_changed(contour_tag)
+
+    def finish_contour_changed(self, contour_tag):
+        # 松开鼠标时立即做一次精确重算, 不等待下一帧
+        self._pending_contour_tags.pop(contour_tag, None)
+        if not self._pending_contour_tags:
+            self._contour_update_timer.stop()
+        self.contour_changed(contour_tag)
+
+    def _contour_window_rect(self, contour_tag):
+        """条带框当前在窗口中的矩形, 不存在时返回 None"""
+        if self.overlay_mode == OVERLAY_CANVAS:
+            return self.overlay_canvas.band_rect(contour_tag)
         contour = self.contour_objs.get(contour_tag)
-        if not contour:
+        return contour.geometry() if contour else None
+
+    def contour_changed(self, contour_tag):
+        rect = self._contour_window_rect(contour_tag)
+        if not rect:
             return
-        x, y = self.window_to_image_coord(contour.x(), contour.y())
-        w, h = int(contour.rect.width() / self.scale_factor), int(contour.rect.height() / self.scale_factor)
-        roi = self.gray[y:y+h, x:x+w]
-        _, roi_thresh = cv2.threshold(roi, self._background_threshold,
-                                      255, cv2.THRESH_BINARY_INV)  # Lower threshold to eliminate more white areas
-        gray_integral = np.sum(roi_thresh)
-        # old_gray_integral = self.results[contour_tag[0]][contour_tag[1]][4]
-        self.results[contour_tag[0]][contour_tag[1]] = (x, y, w, h, gray_integral)
+        x, y = self.window_to_image_coord(rect.x(), rect.y())
+        w, h = int(rect.width() / self.scale_factor), int(rect.height() / self.scale_factor)
+        gray_integral = self._ensure_integrator().band_value(x, y, w, h)
+        self.results.set(contour_tag[0], contour_tag[1], (x, y, w, h, gray_integral))
         grey_value_list = self.grey_value_list_objs.get(contour_tag[0])
         if grey_value_list:
             grey_value_list.update_data_for_contour_idx(contour_tag[1], gray_integral)
 
     def contour_add(self, group_idx):
-        group_contours = self.results[group_idx]
-        left_x = None
-        right_x = None
-        upper_y = None
+        has_live, left, right, bottom = self.results.group_bounds()
+        if not has_live[group_idx]:
+            return
+        left_x, right_x, upper_y = int(left[group_idx]), int(right[group_idx]), int(bottom[group_idx])
         height = 10
-        for contour in group_contours:
-            if contour is None:
-                continue
-            x, y, w, h, _ = contour
-            if left_x is None or x < left_x:
-                left_x = x
-            if right_x is None or x + w > right_x:
-                right_x = x + w
-            if upper_y is None or y + h > upper_y:
-                upper_y = y + h
-        self.results[group_idx].append((left_x, int(upper_y + height / 2), right_x - left_x, height, 0))
+        slot = self.results.append(group_idx, (left_x, int(upper_y + height / 2), right_x - left_x, height, 0))
         self.update()
         self._resize_image_label()
-        new_contour_tag = (group_idx, len(self.results[group_idx]) - 1)
+        new_contour_tag = (group_idx, slot)
         self.contour_changed(new_contour_tag)
         self.contour_changed_cb and self.contour_changed_cb(self.results)
 
     def contour_delete(self, contour_tag):
-        contour = self.contour_objs.get(contour_tag)
-        if not contour:
+        if self._contour_window_rect(contour_tag) is None:
             return
-        self.contour_objs.pop(contour_tag)
-        contour.deleteLater()
+        contour = self.contour_objs.pop(contour_tag, None)
+        if contour:
+            contour.deleteLater()
+        self.overlay_canvas.remove_band(contour_tag)
         group_idx, idx = contour_tag
-        self.results[group_idx][idx] = None     # Mark as deleted
-        for group_info in self.results[group_idx]:
-            if group_info is not None:
-                break
-        else:
+        self.results.delete(group_idx, idx)     # Mark as deleted
+        if not self.results.is_live_group(group_idx):
             self.on_group_delete(group_idx)
             return
-            # self.results[group_idx] = []  # Remove empty group
-            # grey_value_list = self.grey_value_list_objs.get(group_idx)
-            # if grey_value_list:
-            #     grey_value_list.deleteLater()
-            #     self.grey_value_list_objs.pop(group_idx)
         self._refresh_grey_value_list()
         self.contour_changed_cb and self.contour_changed_cb(self.results)
 
@@ -257,36 +773,45 @@ class ImageManager(QWidget):
         if group_name:
             group_name.deleteLater()
             self.group_name_objs.pop(group_idx)
-        self.results[group_idx] = []
+        self.results.delete_group(group_idx)
         for contour_tag in list(self.contour_objs.keys()):
             if contour_tag[0] == group_idx:
                 contour = self.contour_objs.pop(contour_tag)
                 contour.deleteLater()
+        for contour_tag in list(self.overlay_canvas.bands.keys()):
+            if contour_tag[0] == group_idx:
+                self.overlay_canvas.remove_band(contour_tag)
         self._refresh_grey_value_list()
         self.contour_changed_cb and self.contour_changed_cb(self.results)
 
     def init_grey_value_list(self):
-        # 清空旧的灰度值列表
+        groups = self.results.to_groups()
+        # 清理已删除组的灰度值列表
         for group_idx in list(self.grey_value_list_objs.keys()):
-            self.grey_value_list_objs[group_idx].deleteLater()
-        self.grey_value_list_objs.clear()
-        # 创建新的灰度值列表
-        for group_idx, group in enumerate(self.results):
-            if not group:
+            if group_idx >= len(groups) or not any(groups[group_idx]):
+                self.grey_value_list_objs.pop(group_idx).deleteLater()
+        # 复用已有的灰度值列表, 仅为新组创建
+        for group_idx, group in enumerate(groups):
+            if not any(group):
                 continue
-            grey_value_list = GreyValueList(group_idx, self, delete_cb=self.contour_delete, add_cb=self.contour_add)
-            grey_value_list.update_values(group)
-            grey_value_list.show()
-            self.grey_value_list_objs[group_idx] = grey_value_list
+            grey_value_list = self.grey_value_list_objs.get(group_idx)
+            if grey_value_list is None:
+                grey_value_list = GreyValueList(group_idx, self, delete_cb=self.contour_delete,
+                                                add_cb=self.contour_add)
+                grey_value_list.update_values(group)
+                grey_value_list.show()
+                self.grey_value_list_objs[group_idx] = grey_value_list
+            else:
+                grey_value_list.update_values(group)
 
     def init_group_names(self):
-        # 清空旧的组名
-        for group_idx in list(self.group_name_objs.keys()):
-            self.group_name_objs[group_idx].deleteLater()
-        self.group_name_objs.clear()
-        # 创建新的组名
-        for group_idx, group in enumerate(self.results):
-            if not group:
+        live_groups = self.results.live_groups()
+        # 清理已删除组的组名
+        for group_idx in set(self.group_name_objs.keys()).difference(live_groups):
+            self.group_name_objs.pop(group_idx).deleteLater()
+        # 复用已有的组名, 仅为新组创建
+        for group_idx in live_groups:
+            if group_idx in self.group_name_objs:
                 continue
             group_name = GroupNameWidget(self, group_idx, delete_cb=self.on_group_delete,
                                          set_name_cb=self.on_set_group_name)
@@ -297,53 +822,40 @@ class ImageManager(QWidget):
                 self._group_names[group_idx] = group_name.name
             self.group_name_objs[group_idx] = group_name
 
+    def _group_window_bounds(self):
+        """各组存活条带在窗口坐标下的 (是否非空, 左边界, 右边界)"""
+        has_live, left, right, _ = self.results.group_bounds()
+        left = np.where(has_live, left, 0)
+        right = np.where(has_live, right, 0)
+        win_left = (left * self.scale_factor + self.offset[0]).astype(np.int64)
+        win_right = (right * self.scale_factor + self.offset[0]).astype(np.int64)
+        return has_live, win_left, win_right
+
     def _refresh_grey_value_list(self):
-        for group_idx, group in enumerate(self.results):
-            grey_value_list = self.grey_value_list_objs.get(group_idx)
-            if not grey_value_list:
-                continue
+        if not self.grey_value_list_objs:
+            return
+        has_live, win_left, _ = self._group_window_bounds()
+        list_y = self.offset[1] + int(self.gray.shape[0] * self.scale_factor)
+        for group_idx, grey_value_list in self.grey_value_list_objs.items():
             # 将灰度值列表放置在相应轮廓对象的正下方
-            if group:
-                # 获取轮廓左侧坐标
-                lower_x = None
-                for contour_idx in range(len(group)):
-                    contour_tag = (group_idx, contour_idx)
-                    contour = self.contour_objs.get(contour_tag)
-                    if not contour:
-                        continue
-                    if lower_x is None or contour.position.x() < lower_x:
-                        lower_x = contour.position.x()
-                if lower_x is not None:
-                    grey_value_list.move(lower_x,
-                                         self.offset[1] + int(self.original_image.shape[0] * self.scale_factor))
+            if group_idx < len(has_live) and has_live[group_idx]:
+                grey_value_list.move(int(win_left[group_idx]), list_y)
 
     def _refresh_group_names(self):
-        for group_idx, group in enumerate(self.results):
-            group_name = self.group_name_objs.get(group_idx)
-            if not group_name:
-                continue
+        if not self.group_name_objs:
+            return
+        has_live, win_left, win_right = self._group_window_bounds()
+        for group_idx, group_name in self.group_name_objs.items():
             # 将组名放置在相应轮廓对象的正上方, 与图片顶部平齐
-            if not group:
-                continue
-            # 获取轮廓左侧坐标
-            lower_x = None
-            width = 50
-            for contour_idx in range(len(group)):
-                contour_tag = (group_idx, contour_idx)
-                contour = self.contour_objs.get(contour_tag)
-                if not contour:
-                    continue
-                if lower_x is None or contour.position.x() < lower_x:
-                    lower_x = contour.position.x()
-                width = max(width, contour.width() + contour.position.x() - lower_x)
-            if lower_x is not None:
+            if group_idx < len(has_live) and has_live[group_idx]:
+                width = max(50, int(win_right[group_idx] - win_left[group_idx]))
                 group_name.resize(width, 20)
-                group_name.move(lower_x, self.offset[1] - group_name.height())
+                group_name.move(int(win_left[group_idx]), self.offset[1] - group_name.height())
 
     def _resize_image_label(self):
-        if self.original_image is None:
+        if self.gray is None:
             return
-        h, w, ch = self.original_image.shape
+        h, w = self.gray.shape[:2]
         main_window_width = self.parent().width()
         main_window_height = self.parent().height()
         # Calculate the scale factor to fit the image within the window
@@ -353,24 +865,25 @@ class ImageManager(QWidget):
         scaled_width = int(w * self.scale_factor)
         scaled_height = int(h * self.scale_factor)
         self.image_label.resize(scaled_width, scaled_height)
+        self._refresh_pixmap()
         self.update_position()
         self._refresh_grey_value_list()
         self._refresh_group_names()
     
     def update_position(self):
         """根据比例值调整图片的位置"""
-        if self.original_image is None:
+        if self.gray is None:
             return
         main_window_height = self.parent().height()
-        scaled_height = int(self.original_image.shape[0] * self.scale_factor)
+        scaled_height = int(self.gray.shape[0] * self.scale_factor)
         offset_y = int((main_window_height - scaled_height) * self.image_position_ratio)
         self.image_label.move((self.parent().width() - self.image_label.width()) // 2, offset_y)
 
     def _calculate_scale_offset(self):
-        if self.original_image is None:
+        if self.gray is None:
             return
             # 获取原始图像尺寸
-        img_h, img_w = self.original_image.shape[:2]
+        img_h, img_w = self.gray.shape[:2]
         # 获取标签显示区域尺寸
         label_w = self.image_label.width()
         label_h = self.image_label.height()
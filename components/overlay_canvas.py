@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time   : 2026/10/17 13:20
+# @Author : yuyeqing
+# @File   : overlay_canvas.py
+# @IDE    : PyCharm
+from share.consts import CONTOUR_COLOR_LIST
+from PyQt6.QtCore import QRect, Qt, QPoint
+from PyQt6.QtGui import QColor, QPen, QPainter, QBrush
+from PyQt6.QtWidgets import QWidget
+
+
+class OverlayCanvas(QWidget):
+    """在单个控件上一次性绘制所有条带框, 并自行处理拖动/缩放/删除的命中测试"""
+
+    def __init__(self, parent=None, changed_cb=None, finished_cb=None, delete_cb=None):
+        super().__init__(parent=parent)
+        self.changed_cb = changed_cb
+        self.finished_cb = finished_cb
+        self.delete_cb = delete_cb
+        self.resize_handle_size = 6
+        # contour_tag -> 窗口坐标下的 QRect
+        self.bands: dict[tuple[int, int], QRect] = dict()
+        self._colors = [QColor(*rgba) for rgba in CONTOUR_COLOR_LIST]
+        self._active_tag = None
+        self._dragging = False
+        self._resizing = False
+        self._drag_start_pos = QPoint()
+
+    def set_bands(self, bands):
+        self.bands = bands
+        if self._active_tag not in self.bands:
+            self._reset_interaction()
+        self.update()
+
+    def band_rect(self, contour_tag):
+        return self.bands.get(contour_tag)
+
+    def remove_band(self, contour_tag):
+        rect = self.bands.pop(contour_tag, None)
+        if contour_tag == self._active_tag:
+            self._reset_interaction()
+        if rect is not None:
+            self.update(rect.adjusted(-2, -2, 2, 2))
+
+    def clear(self):
+        self.bands = dict()
+        self._reset_interaction()
+        self.update()
+
+    def _reset_interaction(self):
+        self._active_tag = None
+        self._dragging = False
+        self._resizing = False
+
+    def hit_test(self, pos):
+        # 后绘制的条带位于上层, 优先命中
+        for contour_tag, rect in reversed(self.bands.items()):
+            if rect.contains(pos):
+                return contour_tag
+        return None
+
+    def is_on_resize_handle(self, rect, pos):
+        handle_rect = QRect(rect.right() + 1 - self.resize_handle_size,
+                            rect.bottom() + 1 - self.resize_handle_size,
+                            self.resize_handle_size, self.resize_handle_size)
+        return handle_rect.contains(pos)
+
+    def mousePressEvent(self, event):
+        contour_tag = self.hit_test(event.pos())
+        if contour_tag is None:
+            event.ignore()
+            return
+        if event.button() == Qt.MouseButton.LeftButton:
+            self._active_tag = contour_tag
+            if self.is_on_resize_handle(self.bands[contour_tag], event.pos()):
+                self._resizing = True
+            else:
+                self._dragging = True
+            self._drag_start_pos = event.pos()
+        elif event.button() == Qt.MouseButton.RightButton:
+            self.delete_cb and self.delete_cb(contour_tag)
+
+    def mouseMoveEvent(self, event):
+        rect = self.bands.get(self._active_tag)
+        if rect is None:
+            event.ignore()
+            return
+        old_rect = QRect(rect)
+        if self._dragging:
+            rect.translate(event.pos() - self._drag_start_pos)
+            self._drag_start_pos = event.pos()
+        elif self._resizing:
+            # Calculate new size based on mouse position
+            rect.setWidth(max(self.resize_handle_size, event.pos().x() - rect.x()))
+            rect.setHeight(max(self.resize_handle_size, event.pos().y() - rect.y()))
+        else:
+            return
+        self.update(old_rect.united(rect).adjusted(-2, -2, 2, 2))
+        self.changed_cb and self.changed_cb(self._active_tag)
+
+    def mouseReleaseEvent(self, event):
+        if event.button() == Qt.MouseButton.LeftButton and self._active_tag is not None:
+            contour_tag = self._active_tag
+            moved = self._dragging or self._resizing
+            self._reset_interaction()
+            if moved and self.finished_cb:
+                self.finished_cb(contour_tag)
+        else:
+            event.ignore()
+
+    def paintEvent(self, event):
+        if not self.bands:
+            return
+        painter = QPainter(self)
+        clip = event.rect()
+        # 按颜色分批绘制, 减少画笔切换
+        batches = dict()
+        for (_, idx), rect in self.bands.items():
+            if rect.intersects(clip):
+                batches.setdefault(idx % len(self._colors), []).append(rect)
+        hs = self.resize_handle_size
+        for color_idx, rects in batches.items():
+            color = self._colors[color_idx]
+            painter.setPen(QPen(color, 3))
+            painter.setBrush(Qt.BrushStyle.NoBrush)
+            painter.drawRects(rects)
+            painter.setBrush(QBrush(color))
+            painter.drawRects([QRect(r.right() + 1 - hs, r.bottom() + 1 - hs, hs, hs) for r in rects])
+        painter.end()
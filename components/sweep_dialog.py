@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time   : 2026/10/20 15:10
+# @Author : yuyeqing
+# @File   : sweep_dialog.py
+# @IDE    : PyCharm
+from PyQt6.QtCore import Qt
+from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem,
+                             QPushButton, QAbstractItemView, QHeaderView)
+
+
+def _format_value(value):
+    if isinstance(value, tuple):
+        return 'x'.join(str(v) for v in value)
+    if isinstance(value, float):
+        return f"{value:g}"
+    return '-' if value is None else str(value)
+
+
+class SweepDialog(QDialog):
+    """按分数列出参数扫描的候选, 双击或 Apply 应用选中行的参数"""
+    MAX_ROWS = 50
+
+    def __init__(self, parent, results, apply_cb=None):
+        super().__init__(parent=parent)
+        self.results = results[:self.MAX_ROWS]
+        self.apply_cb = apply_cb
+        self._init_ui()
+
+    def _init_ui(self):
+        self.setWindowTitle("Parameter Sweep")
+        self.resize(900, 420)
+        # background_threshold 未参与扫描时为 None, 显示解析出的阈值; 扫描固定使用轮廓引擎
+        param_names = [name for name in self.results[0].params if name not in ('background_threshold', 'engine')] \
+            if self.results else []
+        penalty_names = list(self.results[0].penalties) if self.results else []
+        headers = ['score', 'bands', 'groups'] + param_names + ['threshold'] + penalty_names
+
+        self.table = QTableWidget(len(self.results), len(headers), self)
+        self.table.setHorizontalHeaderLabels(headers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        for row, result in enumerate(self.results):
+            values = ([f"{result.score:.3f}", result.band_count, result.group_count]
+                      + [result.params[name] for name in param_names] + [result.background_threshold]
+                      + [f"{result.penalties[name]:.3f}" for name in penalty_names])
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(_format_value(value))
+                item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
+                self.table.setItem(row, column, item)
+        if self.results:
+            self.table.selectRow(0)
+        self.table.cellDoubleClicked.connect(lambda row, _: self.apply(row))
+
+        apply_button = QPushButton("Apply", self)
+        apply_button.setDefault(True)
+        apply_button.clicked.connect(lambda: self.apply(self.table.currentRow()))
+        close_button = QPushButton("Close", self)
+        close_button.clicked.connect(self.reject)
+        button_layout = QHBoxLayout()
+        button_layout.addStretch()
+        button_layout.addWidget(apply_button)
+        button_layout.addWidget(close_button)
+
+        layout = QVBoxLayout()
+        layout.addWidget(self.table)
+        layout.addLayout(button_layout)
+        self.setLayout(layout)
+
+    def apply(self, row):
+        if not 0 <= row < len(self.results):
+            return
+        self.apply_cb and self.apply_cb(dict(self.results[row].params))
+        self.accept()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time   : 2026/10/18 20:30
+# @Author : yuyeqing
+# @File   : tasks.py
+# @IDE    : PyCharm
+"""QThreadPool 上运行的可取消后台任务, 结果只通过信号交回界面线程"""
+import threading
+from PyQt6.QtCore import QObject, QRunnable, pyqtSignal
+
+
+class TaskCancelled(Exception):
+    pass
+
+
+class TaskSignals(QObject):
+    # 当前步骤名, 已完成步骤数, 总步骤数
+    progress = pyqtSignal(str, int, int)
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+
+class Task(QRunnable):
+    """func(progress) 在工作线程执行; progress(stage) 报告进度, 任务已取消时抛出 TaskCancelled
+
+    取消只在步骤之间生效. 信号对象在界面线程创建, 连接的槽都在界面线程执行.
+    """
+
+    def __init__(self, name, func, stages=()):
+        super().__init__()
+        # 由调用方持有引用, 避免线程池删除后 Python 端仍在访问
+        self.setAutoDelete(False)
+        self.name = name
+        self.func = func
+        self.stages = tuple(stages)
+        self.signals = TaskSignals()
+        self._cancelled = threading.Event()
+        self._done = 0
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def progress(self, stage):
+        if self._cancelled.is_set():
+            raise TaskCancelled(stage)
+        done = self.stages.index(stage) if stage in self.stages else self._done
+        self._done = done
+        self.signals.progress.emit(stage, done, len(self.stages))
+
+    def run(self):
+        try:
+            result = self.func(self.progress)
+        except TaskCancelled:
+            return
+        except Exception as e:
+            if not self.cancelled:
+                self.signals.failed.emit(str(e))
+            return
+        if not self.cancelled:
+            self.signals.finished.emit(result)
@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time   : 2026/10/17 09:12
+# @Author : yuyeqing
+# @File   : analysis.py
+# @IDE    : PyCharm
+"""无界面的条带检测引擎, 只依赖 NumPy/OpenCV, 供 ImageManager 与批处理脚本共用"""
+import cv2
+import numpy as np
+from core.integral import BandIntegrator
+
+BLUR_KSIZE = (5, 5)
+OPEN_KERNEL_SIZE = (3, 3)
+OPEN_ITERATIONS = 2
+# 直方图峰值向暗侧偏移的比例, 作为背景阈值
+BACKGROUND_OFFSET_RATIO = 0.1
+
+
+def load_gray(image_path, anydepth=False):
+    """读取图片并转换为灰度图, 失败时返回 None
+
+    anydepth 为 True 时直接解码为单通道, 16 位图像保持 uint16, 不再经过三通道 BGR
+    """
+    if anydepth:
+        gray = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE | cv2.IMREAD_ANYDEPTH)
+        if gray is None or gray.dtype not in (np.uint8, np.uint16):
+            return None
+        return gray
+    image = cv2.imread(image_path)
+    if image is None or image.ndim != 3 or image.shape[2] != 3:
+        return None
+    return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+
+def estimate_background_threshold(gray, offset_ratio=BACKGROUND_OFFSET_RATIO):
+    # 灰度级数, 8 位为 256, 16 位为 65536
+    levels = int(np.iinfo(gray.dtype).max) + 1
+    # 计算图像的直方图
+    histogram = cv2.calcHist([gray], [0], None, [levels], [0, levels])
+    histogram = histogram.ravel()  # 将直方图转换为一维数组
+
+    # 找到直方图中最大值的索引
+    max_index = np.argmax(histogram)
+    # 选择最大值索引前10%的灰度值作为阈值
+    threshold = max_index - int(offset_ratio * len(histogram))
+
+    # 确保阈值在有效范围内
+    threshold = max(0, min(int(threshold), levels - 1))
+
+    return threshold
+
+
+def blur(gray, ksize=BLUR_KSIZE):
+    return cv2.GaussianBlur(gray, tuple(ksize), 0)
+
+
+def threshold_otsu(blurred):
+    _, thresh = cv2.threshold(blurred, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    if thresh.dtype != np.uint8:
+        # 16 位图像的二值结果转为 8 位, findContours 只接受 8 位输入
+        thresh = thresh.astype(np.uint8)
+    return thresh
+
+
+def open_binary(thresh, kernel_size=OPEN_KERNEL_SIZE, iterations=OPEN_ITERATIONS):
+    kernel = np.ones(tuple(kernel_size), np.uint8)
+    return cv2.morphologyEx(thresh, cv2.MORPH_OPEN, kernel, iterations=iterations)
+
+
+def binarize(gray, blur_ksize=BLUR_KSIZE, open_kernel_size=OPEN_KERNEL_SIZE, open_iterations=OPEN_ITERATIONS):
+    return open_binary(threshold_otsu(blur(gray, blur_ksize)), open_kernel_size, open_iterations)
+
+
+def find_band_contours(gray, binary=None):
+    """binary 为预先计算好的二值图 (如 tiled.binarize_tiled 的结果), 为空时由 gray 计算"""
+    if binary is None:
+        binary = binarize(gray)
+    contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    return contours
+
+
+def bounding_rects(contours):
+    """所有轮廓的外接矩形, 与逐个调用 cv2.boundingRect 的结果相同, 返回 (N, 4) 数组"""
+    if not contours:
+        return np.zeros((0, 4), np.int64)
+    lengths = np.fromiter(map(len, contours), np.int64, len(contours))
+    points = np.concatenate(contours).reshape(-1, 2).astype(np.int64)
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    top_left = np.minimum.reduceat(points, starts)
+    bottom_right = np.maximum.reduceat(points, starts) + 1
+    return np.column_stack((top_left, bottom_right - top_left))
+
+
+def measure_contours(contours, integrator):
+    """一次性计算所有条带的 (x, y, w, h, integral), 返回 (N, 5) 数组"""
+    rects = bounding_rects(contours)
+    values = integrator.band_values(rects[:, 0], rects[:, 1], rects[:, 2], rects[:, 3])
+    return np.column_stack((rects, values))
+
+
+def detect_rects(gray, background_threshold, integrator=None, binary=None):
+    if integrator is None:
+        integrator = BandIntegrator(gray, background_threshold)
+    bands = measure_contours(find_band_contours(gray, binary), integrator)
+    return [tuple(band) for band in bands.tolist()]
+
+
+def group_contours(rects):
+    """按 x 方向重叠把条带分到泳道: 每个条带加入第一个与其重叠的组, 否则新建一组
+
+    条带按左边界升序处理, 组内成员与宽度为正的条带重叠当且仅当成员右边界大于其左边界,
+    所以只需记录每组最大右边界; 左边界单调不减, 不再重叠的组永远不会被选中, 用前移指针跳过.
+    """
+    sorted_rects = sorted(rects, key=lambda r: (r[0], r[1]))  # Sort by x, then y
+
+    def is_same_group(group_rects, find_rect):
+        for rc in group_rects:
+            if max(rc[0] + rc[2], find_rect[0] + find_rect[2]) - min(rc[0], find_rect[0]) < rc[2] + find_rect[2]:
+                return True
+        return False
+
+    groups: list[list] = []
+    max_rights: list = []
+    first_live = 0
+    for rect in sorted_rects:
+        left, width = rect[0], rect[2]
+        while first_live < len(groups) and max_rights[first_live] <= left:
+            first_live += 1
+        if width > 0:
+            group_idx = first_live if first_live < len(groups) else None
+        else:
+            # 宽度非正的退化条带, 逐组使用原始判定
+            group_idx = next((idx for idx in range(first_live, len(groups))
+                              if is_same_group(groups[idx], rect)), None)
+        if group_idx is None:
+            groups.append([rect, ])
+            max_rights.append(left + width)
+        else:
+            groups[group_idx].append(rect)
+            max_rights[group_idx] = max(max_rights[group_idx], left + width)
+    for group_idx, group in enumerate(groups):
+        groups[group_idx] = sorted(group, key=lambda r: r[1])
+    return groups
+
+
+def analyze(gray, background_threshold=None, integrator=None, binary=None):
+    """检测并分组条带, 返回 [[(x, y, w, h, integral), ...], ...]"""
+    if background_threshold is None:
+        background_threshold = estimate_background_threshold(gray)
+    return group_contours(detect_rects(gray, background_threshold, integrator, binary))
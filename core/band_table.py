@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time   : 2026/10/18 09:30
+# @Author : yuyeqing
+# @File   : band_table.py
+# @IDE    : PyCharm
+"""按列存储的条带表, 取代 [[(x, y, w, h, integral) | None, ...], ...] 的嵌套列表"""
+import numpy as np
+
+BAND_DTYPE = np.dtype([
+    ('group', np.int32),
+    ('slot', np.int32),
+    ('x', np.int64),
+    ('y', np.int64),
+    ('w', np.int64),
+    ('h', np.int64),
+    ('value', np.int64),
+    ('live', np.bool_),
+])
+RECT_FIELDS = ('x', 'y', 'w', 'h', 'value')
+
+
+class BandTable:
+    """每行一个条带, (group, slot) 对应旧结构中的 results[group][slot]
+
+    删除单个条带只把 live 置为 False, 保留其 slot 占位 (与旧结构中的 None 一致);
+    删除整组则移除该组所有行, 组序号保留.
+    """
+
+    def __init__(self, bands=None, group_count=0):
+        self.bands = np.zeros(0, BAND_DTYPE) if bands is None else bands
+        self.group_count = group_count
+        self._reindex()
+
+    @classmethod
+    def from_groups(cls, groups):
+        # 旧结构中的 None 占位保留为 live=False 的行
+        rows = [(group_idx, slot, *(rect[:5] if rect is not None else (0, 0, 0, 0, 0)), rect is not None)
+                for group_idx, group in enumerate(groups)
+                for slot, rect in enumerate(group)]
+        bands = np.array(rows, BAND_DTYPE) if rows else np.zeros(0, BAND_DTYPE)
+        return cls(bands, len(groups))
+
+    def copy(self):
+        return BandTable(self.bands.copy(), self.group_count)
+
+    def to_groups(self):
+        lengths = np.zeros(self.group_count, np.int64)
+        np.maximum.at(lengths, self.bands['group'], self.bands['slot'] + 1)
+        groups = [[None] * length for length in lengths.tolist()]
+        live = self.live_bands
+        for group_idx, slot, *rect in zip(live['group'].tolist(), live['slot'].tolist(),
+                                          *(live[field].tolist() for field in RECT_FIELDS)):
+            groups[group_idx][slot] = tuple(rect)
+        return groups
+
+    def _reindex(self):
+        self._index = {(int(g), int(s)): row for row, (g, s) in
+                       enumerate(zip(self.bands['group'].tolist(), self.bands['slot'].tolist()))}
+
+    def __len__(self):
+        return self.group_count
+
+    def clear(self):
+        self.bands = np.zeros(0, BAND_DTYPE)
+        self.group_count = 0
+        self._index.clear()
+
+    @property
+    def live_bands(self):
+        return self.bands[self.bands['live']]
+
+    def get(self, group_idx, slot):
+        row = self._index.get((group_idx, slot))
+        if row is None or not self.bands['live'][row]:
+            return None
+        band = self.bands[row]
+        return tuple(int(band[field]) for field in RECT_FIELDS)
+
+    def set(self, group_idx, slot, rect):
+        band = self.bands[self._index[(group_idx, slot)]]
+        for field, value in zip(RECT_FIELDS, rect):
+            band[field] = value
+        band['live'] = True
+
+    def append(self, group_idx, rect):
+        """在组末尾追加条带, 返回新条带的 slot"""
+        slot = self.group_length(group_idx)
+        row = np.array([(group_idx, slot, *rect[:5], True)], BAND_DTYPE)
+        self._index[(group_idx, slot)] = len(self.bands)
+        self.bands = np.concatenate((self.bands, row))
+        self.group_count = max(self.group_count, group_idx + 1)
+        return slot
+
+    def delete(self, group_idx, slot):
+        row = self._index.get((group_idx, slot))
+        if row is not None:
+            self.bands['live'][row] = False
+
+    def delete_group(self, group_idx):
+        self.bands = self.bands[self.bands['group'] != group_idx]
+        self._reindex()
+
+    def group_length(self, group_idx):
+        """组内 slot 数量, 包含已删除的占位"""
+        slots = self.bands['slot'][self.bands['group'] == group_idx]
+        return int(slots.max()) + 1 if len(slots) else 0
+
+    def group(self, group_idx):
+        """旧结构中 results[group_idx] 的列表形式, 已删除的条带为 None"""
+        group = [None] * self.group_length(group_idx)
+        for band in self.bands[(self.bands['group'] == group_idx) & self.bands['live']]:
+            group[int(band['slot'])] = tuple(int(band[field]) for field in RECT_FIELDS)
+        return group
+
+    def is_live_group(self, group_idx):
+        return bool(np.any(self.bands['live'] & (self.bands['group'] == group_idx)))
+
+    def live_groups(self):
+        return np.unique(self.live_bands['group']).tolist()
+
+    def live_slots(self):
+        """至少在一组中存在的 slot, 用于颜色名称条"""
+        return np.unique(self.live_bands['slot']).tolist()
+
+    def slot_count(self):
+        """所有组中最长的 slot 数量, 包含已删除的占位"""
+        return int(self.bands['slot'].max()) + 1 if len(self.bands) else 0
+
+    def group_bounds(self):
+        """每组存活条带的 (是否非空, 左边界, 右边界, 下边界), 数组长度均为 group_count"""
+        live = self.live_bands
+        has_live = np.bincount(live['group'], minlength=self.group_count) > 0
+        left = np.full(self.group_count, np.iinfo(np.int64).max)
+        right = np.full(self.group_count, np.iinfo(np.int64).min)
+        bottom = np.full(self.group_count, np.iinfo(np.int64).min)
+        np.minimum.at(left, live['group'], live['x'])
+        np.maximum.at(right, live['group'], live['x'] + live['w'])
+        np.maximum.at(bottom, live['group'], live['y'] + live['h'])
+        return has_live, left, right, bottom
+
+    def value_matrix(self):
+        """导出用: 返回 (存活组序号, 数值矩阵[组, slot], 存在掩码)"""
+        live = self.live_bands
+        groups = np.unique(live['group'])
+        rows = np.searchsorted(groups, live['group'])
+        values = np.zeros((len(groups), self.slot_count()), np.int64)
+        present = np.zeros(values.shape, bool)
+        values[rows, live['slot']] = live['value']
+        present[rows, live['slot']] = True
+        return groups, values, present
@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time   : 2026/10/17 09:40
+# @Author : yuyeqing
+# @File   : export.py
+# @IDE    : PyCharm
+import csv
+
+
+class ColorNames(dict):
+
+    def __getitem__(self, idx):
+        if idx not in self:
+            self[idx] = f"Contour_{idx}"
+        return super().__getitem__(idx)
+
+
+def write_results_csv(csvfile, results, group_names, color_names):
+    """按 Group/颜色名 的布局写出每组条带的灰度积分, results 为 BandTable"""
+    rows = result_rows(results, group_names, color_names)
+    fieldnames = ['Group', ] + [color_name for _, color_name in color_names.items()]
+    writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+    writer.writeheader()
+    writer.writerows(rows)
+
+
+def result_rows(results, group_names, color_names):
+    """每组一行的 dict, 键为 'Group' 和各条带的颜色名; 会为出现过的条带序号补全 color_names"""
+    # 先为所有出现过的条带序号补全颜色名, 保证表头完整
+    slot_names = [color_names[contour_idx] for contour_idx in range(results.slot_count())]
+    rows = []
+    groups, values, present = results.value_matrix()
+    for group_idx, group_values, group_present in zip(groups.tolist(), values.tolist(), present.tolist()):
+        group_data = {
+            'Group': group_names.get(group_idx, f"Group{group_idx}"),
+        }
+        for slot_name, gray_data, exists in zip(slot_names, group_values, group_present):
+            if exists:
+                group_data[slot_name] = gray_data
+        rows.append(group_data)
+    return rows
+
+
+def write_stack_csv(csvfile, results, values, image_names, group_names, color_names):
+    """模板套用到图像序列的宽表: 每个条带一行 (Group, 颜色名), 每张图像一列
+
+    results 为模板的 BandTable, values 为 (图像数, 条带数) 的积分值, 列顺序与 results.bands 相同.
+    """
+    writer = csv.writer(csvfile)
+    writer.writerow(['Group', 'Contour'] + list(image_names))
+    bands = sorted(zip(results.bands['group'].tolist(), results.bands['slot'].tolist(), range(len(results.bands))))
+    for group_idx, slot, row in bands:
+        writer.writerow([group_names.get(group_idx, f"Group{group_idx}"), color_names[slot]]
+                        + values[:, row].tolist())
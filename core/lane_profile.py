@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time   : 2026/10/20 18:30
+# @Author : yuyeqing
+# @File   : lane_profile.py
+# @IDE    : PyCharm
+"""基于一维投影的条带检测引擎: 由列投影找泳道, 再由每条泳道的行投影找条带
+
+投影使用扣除背景后的强度 (threshold - gray, 高于阈值的像素记 0), 峰之间的谷比像素计数明显, 用于拆分相邻条带;
+只做几次向量化归约, 不做模糊/形态学/轮廓查找, 图像越大比轮廓引擎快得越多 (见 benchmarks/bench_engines.py). 条带框横向取整条泳道,
+纵向在相邻峰之间的谷底分开, 积分值由掩码的行投影累加得到, 与 BandIntegrator.band_value 对同一框的结果一致.
+返回与 analysis.group_contours 相同的 [[(x, y, w, h, integral), ...], ...] 结构.
+"""
+import cv2
+import numpy as np
+
+# 投影平滑窗口 (像素)
+SMOOTH_SIZE = 5
+# 找泳道时列投影的行取样间隔
+LANE_ROW_STEP = 4
+# 列投影高于最大值的该比例的列属于泳道
+LANE_RATIO = 0.1
+# 低于背景阈值的像素占泳道宽度的比例超过该值的行属于条带
+BAND_RATIO = 0.2
+# 相邻两峰之间的谷底低于较低峰的该比例时从谷底分开
+VALLEY_RATIO = 0.6
+MIN_LANE_WIDTH = 3
+MIN_BAND_HEIGHT = 2
+
+
+def smooth(profile, size=SMOOTH_SIZE):
+    profile = np.asarray(profile, np.float64)
+    if size <= 1 or len(profile) < size:
+        return profile
+    return np.convolve(profile, np.ones(size) / size, mode='same')
+
+
+def find_segments(profile, above, valley_ratio=VALLEY_RATIO, min_length=1):
+    """above 为真的连续区段, 区段内两峰之间的谷足够深时在谷底拆开; 返回 (starts, ends), 左闭右开"""
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], above.view(np.int8), [0]))))
+    starts, ends = edges[::2], edges[1::2]
+    # 局部极大值 (平台取左端)
+    inner = profile[1:-1]
+    peaks = np.flatnonzero((inner > profile[:-2]) & (inner >= profile[2:]) & above[1:-1]) + 1
+    if len(peaks) > 1:
+        run = np.searchsorted(starts, peaks, side='right')
+        cuts = []
+        for left, right, same_run in zip(peaks[:-1].tolist(), peaks[1:].tolist(), (run[:-1] == run[1:]).tolist()):
+            if not same_run:
+                continue
+            valley = left + int(np.argmin(profile[left:right]))
+            if profile[valley] < valley_ratio * min(profile[left], profile[right]):
+                cuts.append(valley)
+        if cuts:
+            starts = np.sort(np.concatenate((starts, cuts)))
+            ends = np.sort(np.concatenate((ends, cuts)))
+    keep = ends - starts >= min_length
+    return starts[keep], ends[keep]
+
+
+def _sum_depth(image):
+    # cv2.reduce 对 16 位输入只支持浮点累加
+    return cv2.CV_32S if image.dtype == np.uint8 else cv2.CV_64F
+
+
+def detect_lanes(gray, background_threshold):
+    """由扣除背景后强度的列投影找泳道, 返回 (x0, x1) 数组; 泳道位置只需投影的形状, 隔行取样"""
+    corrected = cv2.subtract(background_threshold, gray[::LANE_ROW_STEP])
+    columns = smooth(cv2.reduce(corrected, 0, cv2.REDUCE_SUM, dtype=_sum_depth(corrected)).ravel())
+    if not columns.size or columns.max() <= 0:
+        return np.zeros((0, 2), np.int64)
+    starts, ends = find_segments(columns, columns > LANE_RATIO * columns.max(), min_length=MIN_LANE_WIDTH)
+    return np.column_stack((starts, ends)).astype(np.int64)
+
+
+def lane_row_profiles(gray, background_threshold, lanes):
+    """所有泳道的行投影, 返回 (扣除背景后的强度, 低于阈值的像素数), 形状均为 (H, 泳道数)
+
+    每条泳道先复制为连续数组再计算和归约: 直接对窄的 ROI 按行归约要慢一倍, np.add.reduceat 更慢.
+    """
+    intensity = np.zeros((gray.shape[0], len(lanes)))
+    counts = np.zeros((gray.shape[0], len(lanes)), np.int64)
+    for lane_idx, (x0, x1) in enumerate(lanes.tolist()):
+        lane = np.ascontiguousarray(gray[:, x0:x1])
+        corrected = cv2.subtract(background_threshold, lane)
+        intensity[:, lane_idx] = cv2.reduce(corrected, 1, cv2.REDUCE_SUM, dtype=_sum_depth(corrected)).ravel()
+        # compare 的结果为 0/255
+        mask = cv2.compare(lane, background_threshold, cv2.CMP_LE)
+        counts[:, lane_idx] = cv2.reduce(mask, 1, cv2.REDUCE_SUM, dtype=cv2.CV_32S).ravel() // 255
+    return intensity, counts
+
+
+def analyze_profiles(gray, background_threshold):
+    """检测并分组条带, 每条泳道一组, 组内按 y 排序"""
+    lanes = detect_lanes(gray, background_threshold)
+    intensity, counts = lane_row_profiles(gray, background_threshold, lanes)
+    # 积分值: 255 * 框内低于阈值的像素数, 由行投影的前缀和查表
+    prefix = np.vstack((np.zeros((1, counts.shape[1]), np.int64), np.cumsum(counts, axis=0)))
+    groups = []
+    for lane_idx, (x0, x1) in enumerate(lanes.tolist()):
+        above = smooth(counts[:, lane_idx]) > BAND_RATIO * (x1 - x0)
+        starts, ends = find_segments(smooth(intensity[:, lane_idx]), above, min_length=MIN_BAND_HEIGHT)
+        if not len(starts):
+            continue
+        values = 255 * (prefix[ends, lane_idx] - prefix[starts, lane_idx])
+        groups.append([(x0, y0, x1 - x0, y1 - y0, value)
+                       for y0, y1, value in zip(starts.tolist(), ends.tolist(), values.tolist())])
+    return groups
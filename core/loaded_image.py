@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time   : 2026/10/18 20:10
+# @Author : yuyeqing
+# @File   : loaded_image.py
+# @IDE    : PyCharm
+"""解码后的图像及其派生数据 (内容哈希、分析流程、显示金字塔)
+
+只依赖 NumPy/OpenCV, 可以在工作线程中构建, 再交给 ImageManager 在界面线程显示.
+"""
+from collections import OrderedDict
+import cv2
+from core import analysis, tiled, result_cache
+from core.pipeline import AnalysisPipeline
+from core.pyramid import DisplayPyramid
+from core.profiling import PROFILER
+
+# 载入过程依次经过的步骤, 用于进度显示
+LOAD_STAGES = ('decode', 'cvtColor', 'hash', 'histogram', 'pyramid')
+# 超过该像素数时使用分块多线程二值化
+TILED_ANALYSIS_PIXELS = 100_000_000
+
+
+def _no_progress(stage):
+    pass
+
+
+class LoadedImage:
+    def __init__(self, gray, original_image=None, path=None, with_hash=False, analysis_params=None,
+                 tile_pixels=TILED_ANALYSIS_PIXELS, progress=None):
+        """progress(stage) 在每个步骤开始前调用, 可抛出异常以中止构建"""
+        progress = progress or _no_progress
+        self.path = path
+        self.gray = gray
+        self.original_image = original_image
+        self.image_hash = None
+        # 界面侧按尺寸缓存的显示数据 (如 QPixmap) 及其字节数, 随图像一起计入内存预算
+        self.display_cache = OrderedDict()
+        self.display_bytes = dict()
+        if with_hash:
+            progress('hash')
+            with PROFILER.stage('hash'):
+                self.image_hash = result_cache.image_hash(gray)
+        tile_size = tiled.TILE_SIZE if gray.size >= tile_pixels else None
+        self.pipeline = AnalysisPipeline(gray, tile_size, **(analysis_params or dict()))
+        progress('histogram')
+        with PROFILER.stage('histogram'):
+            # 背景阈值由直方图估计, 缓存在 pipeline 中
+            self.pipeline.background_threshold
+        # 积分图每像素 4 字节, 到 measure 或手动编辑条带时才由 pipeline.integrator() 建立
+        progress('pyramid')
+        with PROFILER.stage('pyramid'):
+            self.pyramid = DisplayPyramid(gray if original_image is None else original_image)
+
+    @classmethod
+    def from_file(cls, path, grayscale_only=False, progress=None, **kwargs):
+        """解码失败或格式不支持时抛出 ValueError"""
+        (progress or _no_progress)('decode')
+        if grayscale_only:
+            # 低内存模式: 只保留单通道灰度图, 16 位扫描不降位深, 显示数据也由灰度图生成
+            with PROFILER.stage('decode'):
+                gray = analysis.load_gray(path, anydepth=True)
+            if gray is None:
+                raise ValueError("Failed to load image. Please check the file path.")
+            return cls(gray, None, path, progress=progress, **kwargs)
+        with PROFILER.stage('decode'):
+            original_image = cv2.imread(path)
+        if original_image is None:
+            raise ValueError("Failed to load image. Please check the file path.")
+        if original_image.ndim != 3 or original_image.shape[2] != 3:
+            raise ValueError("Unsupported image format. Only RGB images are supported.")
+        (progress or _no_progress)('cvtColor')
+        with PROFILER.stage('cvtColor'):
+            gray = cv2.cvtColor(original_image, cv2.COLOR_BGR2GRAY)
+        return cls(gray, original_image, path, progress=progress, **kwargs)
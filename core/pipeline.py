@@ -0,0 +1,208 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time   : 2026/10/18 14:20
+# @Author : yuyeqing
+# @File   : pipeline.py
+# @IDE    : PyCharm
+"""按阶段拆分并逐级缓存的分析流程: blur -> binarize -> open -> contours -> measure -> group
+
+每个阶段的缓存键由自身参数与上游阶段的键组成, 只改动某个参数时只重算受影响的下游阶段,
+例如只改背景阈值时只重算 measure 和 group. engine 为 'profile' 时改用 core.lane_profile 的一维投影检测,
+只有 profile 一个阶段.
+"""
+import numpy as np
+from core import analysis, tiled, lane_profile
+from core.integral import BandIntegrator
+from core.band_table import BandTable
+from core.profiling import PROFILER
+
+# 检测引擎: 二维轮廓 / 泳道一维投影
+ENGINE_CONTOURS = 'contours'
+ENGINE_PROFILE = 'profile'
+
+DEFAULT_PARAMS = {
+    'blur_ksize': analysis.BLUR_KSIZE,
+    'open_kernel_size': analysis.OPEN_KERNEL_SIZE,
+    'open_iterations': analysis.OPEN_ITERATIONS,
+    'background_offset_ratio': analysis.BACKGROUND_OFFSET_RATIO,
+    # 为 None 时按 background_offset_ratio 由直方图估计
+    'background_threshold': None,
+    'engine': ENGINE_CONTOURS,
+}
+
+# 各引擎的最终阶段
+ENGINE_STAGES = {
+    ENGINE_CONTOURS: 'group',
+    ENGINE_PROFILE: 'profile',
+}
+
+# 阶段名 -> (上游阶段, 本阶段参数)
+STAGES = {
+    'blur': (None, ('blur_ksize',)),
+    'binarize': ('blur', ()),
+    'open': ('binarize', ('open_kernel_size', 'open_iterations')),
+    'contours': ('open', ()),
+    'measure': ('contours', ('background_threshold',)),
+    'group': ('measure', ()),
+    'profile': (None, ('background_threshold',)),
+}
+
+
+class AnalysisPipeline:
+    """tile_size 不为空时 blur/binarize/open 合并为一次 tiled.binarize_tiled, 不保留整幅中间结果"""
+
+    def __init__(self, gray, tile_size=None, **params):
+        self.gray = gray
+        self.tile_size = tile_size
+        self.params = dict(DEFAULT_PARAMS)
+        self._memo = dict()
+        self._thresholds = dict()
+        self._integrator = None
+        # 最近一次 run 实际重算的阶段, 按执行顺序
+        self.last_run = []
+        self._progress = None
+        self.set_params(**params)
+
+    def set_params(self, **params):
+        unknown = set(params).difference(DEFAULT_PARAMS)
+        if unknown:
+            raise ValueError(f"Unknown analysis parameters: {sorted(unknown)}")
+        if params.get('engine', ENGINE_CONTOURS) not in ENGINE_STAGES:
+            raise ValueError(f"Unknown detection engine: {params['engine']}")
+        for name, value in params.items():
+            self.params[name] = tuple(value) if isinstance(value, list) else value
+
+    @property
+    def background_threshold(self):
+        if self.params['background_threshold'] is not None:
+            return int(self.params['background_threshold'])
+        ratio = self.params['background_offset_ratio']
+        if ratio not in self._thresholds:
+            self._thresholds[ratio] = analysis.estimate_background_threshold(self.gray, ratio)
+        return self._thresholds[ratio]
+
+    def resolved_params(self):
+        """背景阈值已解析为具体数值的参数, 用作结果缓存的键"""
+        params = dict(self.params)
+        params['background_threshold'] = self.background_threshold
+        if params['engine'] == ENGINE_CONTOURS:
+            # 默认引擎不写入键, 加入引擎参数之前缓存的结果仍然有效
+            del params['engine']
+        return params
+
+    def stage_names(self, stage=None):
+        """当前引擎下到 stage (默认为最终阶段) 为止要经过的阶段, 按执行顺序, 用于进度显示"""
+        name = stage or ENGINE_STAGES[self.params['engine']]
+        names = []
+        while name is not None:
+            names.append(name)
+            name = self._upstream(name)
+        return tuple(reversed(names))
+
+    def integrator(self, background_threshold=None):
+        """按背景阈值缓存积分图, 阈值不变时复用"""
+        if background_threshold is None:
+            background_threshold = self.background_threshold
+        if self._integrator is None or self._integrator.background_threshold != background_threshold:
+            # 先释放旧积分图, 换阈值时不同时持有两份
+            self._integrator = None
+            self._integrator = BandIntegrator(self.gray, background_threshold)
+        return self._integrator
+
+    def run(self, stage=None, progress=None):
+        """stage 默认为当前引擎的最终阶段; progress(stage) 在每个需要重算的阶段开始前调用, 可抛出异常中止;
+        已完成的阶段保留在缓存中
+        """
+        self.last_run = []
+        self._progress = progress
+        try:
+            return self._run(stage or ENGINE_STAGES[self.params['engine']])
+        finally:
+            self._progress = None
+
+    def clear(self):
+        self._memo.clear()
+
+    def nbytes(self):
+        """缓存的中间结果与积分图占用的内存; 先取快照, 工作线程同时写入缓存时也可调用"""
+        values = [value for _, value in list(self._memo.values())]
+        integrator = self._integrator
+        return (sum(value.nbytes for value in values if isinstance(value, np.ndarray))
+                + (integrator.nbytes if integrator is not None else 0))
+
+    def copy(self):
+        """共享原图与已缓存阶段结果的副本, 交给工作线程运行, 界面线程随后修改参数不影响正在进行的分析"""
+        other = AnalysisPipeline(self.gray, self.tile_size, **self.params)
+        other._memo = dict(self._memo)
+        other._thresholds = dict(self._thresholds)
+        other._integrator = self._integrator
+        return other
+
+    def merge(self, other):
+        """采用副本 (copy 得到, 已运行完毕) 新算出的阶段结果"""
+        self._memo.update(other._memo)
+        self._thresholds.update(other._thresholds)
+        self._integrator = other._integrator
+        self.last_run = list(other.last_run)
+
+    def _stage_key(self, name):
+        upstream, param_names = STAGES[name]
+        own = tuple(self.background_threshold if param == 'background_threshold' else self.params[param]
+                    for param in param_names)
+        return own if upstream is None else (own, self._stage_key(upstream))
+
+    def _upstream(self, name):
+        if name == 'open' and self.tile_size:
+            # 分块模式下 open 直接由原图计算
+            return None
+        return STAGES[name][0]
+
+    def _run(self, name):
+        key = self._stage_key(name)
+        memo = self._memo.get(name)
+        if memo is not None and memo[0] == key:
+            return memo[1]
+        # 先取上游结果, 各阶段的计时只包含本阶段
+        upstream = self._upstream(name)
+        source = self.gray if upstream is None else self._run(upstream)
+        self._progress and self._progress(name)
+        with PROFILER.stage(name):
+            value = getattr(self, f'_stage_{name}')(source)
+        self._memo[name] = (key, value)
+        self.last_run.append(name)
+        return value
+
+    def _stage_blur(self, gray):
+        return analysis.blur(gray, self.params['blur_ksize'])
+
+    def _stage_binarize(self, blurred):
+        return analysis.threshold_otsu(blurred)
+
+    def _stage_open(self, source):
+        if self.tile_size:
+            return tiled.binarize_tiled(source, self.tile_size, blur_ksize=self.params['blur_ksize'],
+                                        open_kernel_size=self.params['open_kernel_size'],
+                                        open_iterations=self.params['open_iterations'])
+        return analysis.open_binary(source, self.params['open_kernel_size'], self.params['open_iterations'])
+
+    def _stage_contours(self, binary):
+        return analysis.find_band_contours(self.gray, binary)
+
+    def _stage_measure(self, contours):
+        return analysis.measure_contours(contours, self.integrator())
+
+    def _stage_group(self, bands):
+        return analysis.group_contours([tuple(band) for band in bands.tolist()])
+
+    def _stage_profile(self, gray):
+        return lane_profile.analyze_profiles(gray, self.background_threshold)
+
+
+def analyze_file(image_path, grayscale_only=False, analysis_params=None):
+    """解码并运行完整流程, 供 batch/监视文件夹/分析服务的工作进程使用; 解码失败时抛出 ValueError"""
+    with PROFILER.stage('analyze_file'):
+        with PROFILER.stage('decode'):
+            gray = analysis.load_gray(image_path, anydepth=grayscale_only)
+        if gray is None:
+            raise ValueError(f"Failed to load image: {image_path}")
+        return BandTable.from_groups(AnalysisPipeline(gray, **(analysis_params or dict())).run())
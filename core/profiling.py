@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time   : 2026/10/18 18:30
+# @Author : yuyeqing
+# @File   : profiling.py
+# @IDE    : PyCharm
+"""按步骤记录耗时与峰值内存的轻量埋点
+
+    with PROFILER.stage('decode'):
+        ...
+
+关闭时 stage() 直接返回同一个空上下文, 开销只有一次属性判断.
+峰值内存由 tracemalloc 统计, NumPy/OpenCV 返回的数组都会被计入; 多线程同时记录时峰值会相互叠加.
+"""
+import os
+import json
+import time
+import threading
+import tracemalloc
+from collections import deque
+from contextlib import nullcontext
+
+_NULL_STAGE = nullcontext()
+
+
+class _Stage:
+    __slots__ = ('profiler', 'name', 'record', 'start', 'trace_memory', 'base_bytes', 'peak_bytes')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.trace_memory = profiler.trace_memory
+        self.base_bytes = 0
+        self.peak_bytes = 0
+
+    def __enter__(self):
+        stack = self.profiler._stack()
+        parent = stack[-1] if stack else None
+        self.record = {"stage": self.name, "parent": parent.name if parent else None, "depth": len(stack),
+                       "pid": os.getpid()}
+        if self.trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if parent is not None:
+                # 重置峰值前先把已出现的峰值计入上层
+                parent.peak_bytes = max(parent.peak_bytes, peak - parent.base_bytes)
+            tracemalloc.reset_peak()
+            self.base_bytes = current
+        stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        elapsed = time.perf_counter() - self.start
+        stack = self.profiler._stack()
+        stack.pop()
+        self.record["ms"] = 1000 * elapsed
+        if self.trace_memory:
+            _, peak = tracemalloc.get_traced_memory()
+            self.peak_bytes = max(self.peak_bytes, peak - self.base_bytes)
+            self.record["peak_bytes"] = self.peak_bytes
+            if stack:
+                stack[-1].peak_bytes = max(stack[-1].peak_bytes, peak - stack[-1].base_bytes)
+        self.record["time"] = time.time()
+        self.profiler._add(self.record, top_level=not stack)
+        return False
+
+
+class Profiler:
+    MAX_RECORDS = 10000
+
+    def __init__(self):
+        self.enabled = False
+        self.trace_memory = False
+        self.records = deque(maxlen=self.MAX_RECORDS)
+        # 每个最外层步骤结束时回调, 参数为该步骤及其子步骤的记录
+        self.listeners = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._sink = None
+        self._pending = dict()
+        self._owns_tracing = False
+
+    def start(self, trace_memory=True, path=None):
+        """开始记录; path 不为空时每条记录同时以 JSON 行追加写入该文件"""
+        if self.enabled:
+            self.stop()
+        self.trace_memory = trace_memory
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracing = True
+        if path:
+            self._sink = open(path, 'a')
+        self.enabled = True
+
+    def stop(self):
+        self.enabled = False
+        if self._owns_tracing:
+            tracemalloc.stop()
+            self._owns_tracing = False
+        self.trace_memory = False
+        if self._sink:
+            self._sink.close()
+            self._sink = None
+
+    def stage(self, name):
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name)
+
+    def dump(self, path):
+        """把已记录的全部步骤以 JSON 行写出"""
+        with open(path, 'w') as f:
+            for record in list(self.records):
+                f.write(json.dumps(record) + '\n')
+
+    def clear(self):
+        self.records.clear()
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _add(self, record, top_level):
+        with self._lock:
+            self.records.append(record)
+            if self._sink:
+                self._sink.write(json.dumps(record) + '\n')
+                self._sink.flush()
+            # 子步骤先于外层结束, 按线程暂存到外层结束时一起通知
+            pending = self._pending.setdefault(threading.get_ident(), [])
+            pending.append(record)
+            if not top_level:
+                return
+            group = self._pending.pop(threading.get_ident())
+        for listener in list(self.listeners):
+            listener(group)
+
+
+def format_summary(records):
+    """状态栏用的单行摘要: 最外层步骤耗时, 以及各直接子步骤耗时"""
+    top = records[-1]
+    children = [record for record in records if record["depth"] == top["depth"] + 1]
+    text = f"{top['stage']} {top['ms']:.1f} ms"
+    if children:
+        text += " (" + ", ".join(f"{record['stage']} {record['ms']:.1f}" for record in children) + ")"
+    if "peak_bytes" in top:
+        text += f", peak {top['peak_bytes'] / 1024 / 1024:.1f} MB"
+    return text
+
+
+PROFILER = Profiler()
@@ -0,0 +1,194 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time   : 2026/10/19 14:20
+# @Author : yuyeqing
+# @File   : project.py
+# @IDE    : PyCharm
+"""二进制项目文件: 条带表、组名、颜色名与分析参数, 可选内嵌灰度图
+
+文件布局 (各段按 64 字节对齐):
+    [0, 64)         文件头: 魔数, 索引偏移, 索引长度
+    [64, ...)       内嵌灰度图, C 顺序原始数据, 打开时以 np.memmap 映射, 不需要解码
+    尾段            results / detected 条带表 (BAND_DTYPE 原始字节) + JSON 索引
+
+图像不变时再次保存只重写尾段, 新尾段写在不与旧尾段重叠的位置, 写完后再改文件头中的索引指针,
+中途中断时文件仍指向旧尾段.
+"""
+import os
+import json
+import struct
+import numpy as np
+from core.band_table import BandTable, BAND_DTYPE
+from core.result_cache import image_hash
+
+PROJECT_MAGIC = b'GELPRJ\x00\x01'
+PROJECT_VERSION = 1
+HEADER_SIZE = 64
+ALIGN = 64
+_HEADER = struct.Struct('<8sQQ')
+
+
+def _align(offset):
+    return (offset + ALIGN - 1) // ALIGN * ALIGN
+
+
+class Project:
+    """项目文件内容; gray 为空表示未内嵌图像, 打开时按 image_path 重新解码"""
+
+    def __init__(self, results, detected=None, group_names=None, color_names=None, image_path=None,
+                 gray=None, image_hash=None, analysis_params=None):
+        self.results = results
+        self.detected = detected
+        self.group_names = dict(group_names or dict())
+        self.color_names = dict(color_names or dict())
+        self.image_path = image_path
+        self.gray = gray
+        self.image_hash = image_hash
+        self.analysis_params = dict(analysis_params or dict())
+
+
+def _read_index(f):
+    """返回 (索引, 索引偏移, 索引长度); 不是项目文件时抛出 ValueError"""
+    header = f.read(HEADER_SIZE)
+    if len(header) < HEADER_SIZE:
+        raise ValueError("Not a gel project file.")
+    magic, index_offset, index_length = _HEADER.unpack_from(header)
+    if magic != PROJECT_MAGIC:
+        raise ValueError("Not a gel project file.")
+    f.seek(index_offset)
+    index = json.loads(f.read(index_length).decode())
+    if index.get('version') != PROJECT_VERSION:
+        raise ValueError(f"Unsupported project version: {index.get('version')}")
+    return index, index_offset, index_length
+
+
+def _read_table(f, entry):
+    if entry is None:
+        return None
+    f.seek(entry['offset'])
+    bands = np.frombuffer(f.read(entry['count'] * BAND_DTYPE.itemsize), BAND_DTYPE).copy()
+    return BandTable(bands, entry['group_count'])
+
+
+def load_project(path, mmap=True):
+    """读取项目文件; 内嵌灰度图默认以只读 np.memmap 返回, 只在访问时按页读入"""
+    with open(path, 'rb') as f:
+        index, _, _ = _read_index(f)
+        results = _read_table(f, index['results'])
+        detected = _read_table(f, index['detected'])
+    gray = None
+    image = index['image']
+    if image is not None:
+        shape, dtype = tuple(image['shape']), np.dtype(image['dtype'])
+        if mmap:
+            gray = np.memmap(path, dtype, 'r', image['offset'], shape)
+        else:
+            with open(path, 'rb') as f:
+                f.seek(image['offset'])
+                gray = np.fromfile(f, dtype, int(np.prod(shape))).reshape(shape)
+    return Project(results, detected,
+                   {int(group_idx): name for group_idx, name in index['group_names'].items()},
+                   {int(idx): name for idx, name in index['color_names'].items()},
+                   index['image_path'], gray, index['image_hash'], index['analysis_params'])
+
+
+def _tail(project, tail_offset, image_entry):
+    """尾段字节与其中的索引 JSON; 偏移均为文件内绝对位置"""
+    chunks = []
+    position = tail_offset
+    entries = dict()
+    for name in ('results', 'detected'):
+        table = getattr(project, name)
+        if table is None:
+            entries[name] = None
+            continue
+        data = np.ascontiguousarray(table.bands, BAND_DTYPE).tobytes()
+        entries[name] = {'offset': position, 'count': len(table.bands), 'group_count': table.group_count}
+        padded = _align(len(data))
+        chunks.append(data + b'\0' * (padded - len(data)))
+        position += padded
+    index = dict(entries, version=PROJECT_VERSION, tail_offset=tail_offset, image=image_entry,
+                 image_path=project.image_path, image_hash=project.image_hash,
+                 group_names={str(group_idx): name for group_idx, name in project.group_names.items()},
+                 color_names={str(idx): name for idx, name in project.color_names.items()},
+                 analysis_params=project.analysis_params)
+    index_bytes = json.dumps(index).encode()
+    return b''.join(chunks), position, index_bytes
+
+
+def _image_entry(gray):
+    return {'offset': HEADER_SIZE, 'shape': list(gray.shape), 'dtype': gray.dtype.str}
+
+
+def _existing_index(path):
+    try:
+        with open(path, 'rb') as f:
+            return _read_index(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_project(path, project, embed_image=True):
+    """保存项目, 返回实际写入的字节数
+
+    文件已内嵌同一图像时只追加新尾段并改写文件头; 否则写入临时文件后整体替换.
+    """
+    gray = project.gray if embed_image else None
+    if gray is not None and project.image_hash is None:
+        project.image_hash = image_hash(gray)
+    existing = _existing_index(path) if gray is not None else None
+    if existing is not None:
+        index, index_offset, index_length = existing
+        image = index['image']
+        if (image is not None and index['image_hash'] == project.image_hash
+                and image['shape'] == list(gray.shape) and image['dtype'] == gray.dtype.str):
+            return _save_tail(path, project, image, index['tail_offset'], index_offset + index_length)
+    return _save_full(path, project, gray)
+
+
+def _save_tail(path, project, image_entry, old_tail_start, old_tail_end):
+    image_end = _align(image_entry['offset'] + int(np.prod(image_entry['shape'])) * np.dtype(image_entry['dtype']).itemsize)
+    tables, index_offset, index_bytes = _tail(project, image_end, image_entry)
+    if image_end + len(tables) + len(index_bytes) > old_tail_start:
+        # 与旧尾段重叠时写到旧尾段之后, 下次保存再挪回图像末尾
+        tables, index_offset, index_bytes = _tail(project, _align(old_tail_end), image_entry)
+    tail_offset = index_offset - len(tables)
+    with open(path, 'r+b') as f:
+        f.seek(tail_offset)
+        f.write(tables)
+        f.write(index_bytes)
+        f.flush()
+        os.fsync(f.fileno())
+        f.seek(0)
+        f.write(_HEADER.pack(PROJECT_MAGIC, index_offset, len(index_bytes)))
+        f.flush()
+        os.fsync(f.fileno())
+        end = index_offset + len(index_bytes)
+        if end < old_tail_end:
+            try:
+                f.truncate(end)
+            except OSError:
+                # 图像被映射时部分平台不允许截断, 多出的旧尾段不影响读取
+                pass
+    return len(tables) + len(index_bytes) + _HEADER.size
+
+
+def _save_full(path, project, gray):
+    image_entry = None
+    tail_offset = HEADER_SIZE
+    if gray is not None:
+        image_entry = _image_entry(gray)
+        tail_offset = _align(HEADER_SIZE + gray.nbytes)
+    tables, index_offset, index_bytes = _tail(project, tail_offset, image_entry)
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(_HEADER.pack(PROJECT_MAGIC, index_offset, len(index_bytes)).ljust(HEADER_SIZE, b'\0'))
+        if gray is not None:
+            f.write(np.ascontiguousarray(gray).data)
+            f.write(b'\0' * (tail_offset - HEADER_SIZE - gray.nbytes))
+        f.write(tables)
+        f.write(index_bytes)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+    return index_offset + len(index_bytes)
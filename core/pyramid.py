@@ -0,0 +1,34 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time   : 2026/10/17 16:30
+# @Author : yuyeqing
+# @File   : pyramid.py
+# @IDE    : PyCharm
+"""显示用的多分辨率金字塔, 载入时构建一次, 缩放时从最接近的层取图"""
+import cv2
+
+
+class DisplayPyramid:
+    def __init__(self, image, min_size=256):
+        self.levels = [image]
+        # 逐层 pyrDown 减半, 直到短边不足 min_size
+        while min(self.levels[-1].shape[:2]) // 2 >= min_size:
+            self.levels.append(cv2.pyrDown(self.levels[-1]))
+
+    @property
+    def shape(self):
+        return self.levels[0].shape
+
+    def level_for_size(self, width, height):
+        """不小于目标尺寸的最小一层, 目标大于原图时返回原图"""
+        for level in reversed(self.levels):
+            if level.shape[1] >= width and level.shape[0] >= height:
+                return level
+        return self.levels[0]
+
+    def render(self, width, height):
+        level = self.level_for_size(width, height)
+        if level.shape[1] == width and level.shape[0] == height:
+            return level
+        interpolation = cv2.INTER_AREA if level.shape[1] > width else cv2.INTER_LINEAR
+        return cv2.resize(level, (width, height), interpolation=interpolation)
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time   : 2026/10/18 11:05
+# @Author : yuyeqing
+# @File   : result_cache.py
+# @IDE    : PyCharm
+"""分析结果的磁盘缓存, 以图像内容哈希 + 分析参数为键, 按总大小做 LRU 淘汰"""
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import numpy as np
+from core.band_table import BandTable, BAND_DTYPE
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.gel_reader', 'results.sqlite')
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def image_hash(gray):
+    """解码后灰度图的内容哈希, 与文件名/编码格式无关"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{gray.shape}{gray.dtype}".encode())
+    digest.update(np.ascontiguousarray(gray).data)
+    return digest.hexdigest()
+
+
+def cache_key(gray_hash, params):
+    """params 为 AnalysisPipeline.resolved_params(), 背景阈值已解析为具体数值"""
+    return f"{gray_hash}:{json.dumps(params, sort_keys=True)}"
+
+
+class ResultCache:
+    """每条记录保存检测结果、手动编辑后的结果和组名"""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=DEFAULT_MAX_BYTES):
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.max_bytes = max_bytes
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                detected BLOB NOT NULL,
+                detected_groups INTEGER NOT NULL,
+                edited BLOB NOT NULL,
+                edited_groups INTEGER NOT NULL,
+                group_names TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            )""")
+        self._conn.commit()
+
+    def load(self, key):
+        """返回 (检测结果, 编辑后结果, 组名), 未命中返回 None"""
+        row = self._conn.execute(
+            "SELECT detected, detected_groups, edited, edited_groups, group_names FROM results WHERE key = ?",
+            (key,)).fetchone()
+        if row is None:
+            return None
+        self._conn.execute("UPDATE results SET last_access = ? WHERE key = ?", (time.time(), key))
+        self._conn.commit()
+        detected, detected_groups, edited, edited_groups, group_names = row
+        return (self._unpack(detected, detected_groups), self._unpack(edited, edited_groups),
+                {int(group_idx): name for group_idx, name in json.loads(group_names).items()})
+
+    def store(self, key, detected, edited, group_names):
+        detected_blob = detected.bands.tobytes()
+        edited_blob = edited.bands.tobytes()
+        names = json.dumps({str(group_idx): name for group_idx, name in group_names.items()})
+        size = len(detected_blob) + len(edited_blob) + len(names) + len(key)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (key, detected_blob, detected.group_count, edited_blob, edited.group_count, names, size, time.time()))
+        self._evict()
+        self._conn.commit()
+
+    def remove(self, key):
+        self._conn.execute("DELETE FROM results WHERE key = ?", (key,))
+        self._conn.commit()
+
+    def total_bytes(self):
+        return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+
+    def close(self):
+        self._conn.close()
+
+    def _evict(self):
+        # 超出容量时按最近访问时间从旧到新删除
+        total = self.total_bytes()
+        if total <= self.max_bytes:
+            return
+        for key, size in self._conn.execute("SELECT key, size FROM results ORDER BY last_access").fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM results WHERE key = ?", (key,))
+            total -= size
+
+    @staticmethod
+    def _unpack(blob, group_count):
+        return BandTable(np.frombuffer(blob, BAND_DTYPE).copy(), group_count)
@@ -0,0 +1,229 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time   : 2026/10/19 21:00
+# @Author : yuyeqing
+# @File   : service.py
+# @IDE    : PyCharm
+"""常驻分析服务: 保持一组已导入 OpenCV/NumPy 的工作进程, 通过本地套接字接收任务并按完成顺序返回结果
+
+每条消息为 8 字节头 (JSON 长度, 负载长度, 大端) + JSON + 负载. 请求:
+    {"op": "analyze", "id": 1, "path": "...", "params": {...}, "color_names": {...}, "grayscale_only": false}
+    {"op": "ping", "id": 2}
+    {"op": "shutdown"}
+analyze 的回复负载为 BAND_DTYPE 原始字节, JSON 中带 group_count; 给出 color_names 时另带 export_to_csv
+布局的 fieldnames/rows. 失败时 status 为 "error", 同一连接上的多个任务可以并发, 回复按完成顺序到达.
+"""
+import os
+import json
+import socket
+import struct
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from core.band_table import BandTable, BAND_DTYPE
+from core.export import ColorNames, result_rows
+
+DEFAULT_SOCKET = os.path.join(os.path.expanduser('~'), '.gel_reader', 'analysis.sock')
+_HEADER = struct.Struct('>II')
+
+
+def _pack(message, payload=b''):
+    data = json.dumps(message).encode()
+    return _HEADER.pack(len(data), len(payload)) + data + payload
+
+
+def _warm_up():
+    """工作进程启动时先跑一遍小图, 导入与初始化都在接到任务之前完成"""
+    from core.pipeline import AnalysisPipeline
+    gray = np.full((64, 64), 220, np.uint8)
+    gray[20:30, 10:50] = 40
+    AnalysisPipeline(gray).run()
+
+
+def _analyze(path, grayscale_only, params):
+    from core.pipeline import analyze_file
+    results = analyze_file(path, grayscale_only, params)
+    return results.bands, results.group_count
+
+
+class AnalysisServer:
+    """address 为 Unix 套接字路径, 或 (host, port) 使用本机 TCP (不支持 AF_UNIX 的平台)"""
+
+    def __init__(self, address=DEFAULT_SOCKET, workers=None):
+        self.address = address
+        self.workers = workers or os.cpu_count() or 1
+        self._executor = None
+        self._server = None
+        self._stopped = None
+
+    async def serve(self, ready=None):
+        """启动工作进程并监听, 直到收到 shutdown; ready() 在可以接受连接时调用"""
+        loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        self._executor = ProcessPoolExecutor(self.workers, initializer=_warm_up)
+        # 工作进程按需启动, 先让每个进程都跑过 _warm_up
+        await asyncio.gather(*(loop.run_in_executor(self._executor, os.getpid) for _ in range(self.workers)))
+        if isinstance(self.address, str):
+            os.makedirs(os.path.dirname(os.path.abspath(self.address)), exist_ok=True)
+            if os.path.exists(self.address):
+                os.remove(self.address)
+            self._server = await asyncio.start_unix_server(self._handle, self.address)
+        else:
+            self._server = await asyncio.start_server(self._handle, *self.address)
+        ready and ready()
+        try:
+            await self._stopped.wait()
+        finally:
+            self._server.close()
+            await self._server.wait_closed()
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            if isinstance(self.address, str) and os.path.exists(self.address):
+                os.remove(self.address)
+
+    def run(self, ready=None):
+        asyncio.run(self.serve(ready))
+
+    async def _handle(self, reader, writer):
+        pending = set()
+        try:
+            while True:
+                try:
+                    json_length, payload_length = _HEADER.unpack(await reader.readexactly(_HEADER.size))
+                    message = json.loads(await reader.readexactly(json_length))
+                    await reader.readexactly(payload_length)
+                except asyncio.IncompleteReadError:
+                    break
+                op = message.get('op')
+                if op == 'analyze':
+                    task = asyncio.create_task(self._run_job(message, writer))
+                    pending.add(task)
+                    task.add_done_callback(pending.discard)
+                elif op == 'ping':
+                    writer.write(_pack({'id': message.get('id'), 'status': 'ok', 'pid': os.getpid()}))
+                elif op == 'shutdown':
+                    self._stopped.set()
+                    break
+                else:
+                    writer.write(_pack({'id': message.get('id'), 'status': 'error', 'error': f"Unknown op: {op}"}))
+            if pending:
+                await asyncio.gather(*pending)
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def _run_job(self, message, writer):
+        loop = asyncio.get_running_loop()
+        reply = {'id': message.get('id'), 'path': message.get('path')}
+        try:
+            bands, group_count = await loop.run_in_executor(
+                self._executor, _analyze, message['path'], message.get('grayscale_only', False),
+                message.get('params'))
+        except Exception as e:
+            writer.write(_pack(dict(reply, status='error', error=str(e))))
+        else:
+            reply.update(status='ok', group_count=group_count)
+            if message.get('color_names') is not None:
+                color_names = ColorNames({int(idx): name for idx, name in message['color_names'].items()})
+                reply['rows'] = result_rows(BandTable(bands, group_count), dict(), color_names)
+                reply['fieldnames'] = ['Group', ] + [color_name for _, color_name in color_names.items()]
+            writer.write(_pack(reply, bands.tobytes()))
+        await writer.drain()
+
+
+class JobResult:
+    """analyze 的回复; 失败时 results 为 None, error 为错误信息"""
+
+    def __init__(self, job_id, path, results=None, rows=None, fieldnames=None, error=None):
+        self.id = job_id
+        self.path = path
+        self.results = results
+        self.rows = rows
+        self.fieldnames = fieldnames
+        self.error = error
+
+
+class AnalysisClient:
+    """同步客户端, 任务可以连续提交, 结果按完成顺序读取
+
+        with AnalysisClient() as client:
+            for result in client.analyze_many(paths, color_names={0: 'IgG'}):
+                ...
+    """
+
+    def __init__(self, address=DEFAULT_SOCKET, timeout=None):
+        if isinstance(address, str):
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        else:
+            self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._sock.settimeout(timeout)
+        self._sock.connect(address)
+        self._reader = self._sock.makefile('rb')
+        self._next_id = 0
+        self.outstanding = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        self._reader.close()
+        self._sock.close()
+
+    def _send(self, message):
+        self._sock.sendall(_pack(message))
+
+    def _receive(self):
+        header = self._reader.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            raise ConnectionError("Analysis service closed the connection.")
+        json_length, payload_length = _HEADER.unpack(header)
+        message = json.loads(self._reader.read(json_length))
+        return message, self._reader.read(payload_length)
+
+    def ping(self):
+        """测量往返开销, 只在没有在途任务时调用"""
+        self._next_id += 1
+        self._send({'op': 'ping', 'id': self._next_id})
+        message, _ = self._receive()
+        return message
+
+    def submit(self, path, params=None, color_names=None, grayscale_only=False):
+        """提交任务但不等待, 返回任务 id"""
+        self._next_id += 1
+        self._send({'op': 'analyze', 'id': self._next_id, 'path': os.path.abspath(path), 'params': params,
+                    'color_names': None if color_names is None else {str(k): v for k, v in color_names.items()},
+                    'grayscale_only': grayscale_only})
+        self.outstanding += 1
+        return self._next_id
+
+    def receive(self):
+        """读取下一个完成的任务"""
+        message, payload = self._receive()
+        self.outstanding -= 1
+        if message['status'] != 'ok':
+            return JobResult(message['id'], message['path'], error=message['error'])
+        bands = BandTable(np.frombuffer(payload, BAND_DTYPE).copy(), message['group_count'])
+        return JobResult(message['id'], message['path'], bands, message.get('rows'), message.get('fieldnames'))
+
+    def analyze(self, path, **kwargs):
+        """提交单个任务并等待, 失败时抛出 RuntimeError"""
+        self.submit(path, **kwargs)
+        result = self.receive()
+        if result.error is not None:
+            raise RuntimeError(result.error)
+        return result.results
+
+    def analyze_many(self, paths, window=256, **kwargs):
+        """按完成顺序产出 JobResult; 同时在途的任务不超过 window, 避免双方缓冲区塞满"""
+        for path in paths:
+            if self.outstanding >= window:
+                yield self.receive()
+            self.submit(path, **kwargs)
+        while self.outstanding:
+            yield self.receive()
+
+    def shutdown(self):
+        self._send({'op': 'shutdown'})
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time   : 2026/10/19 09:40
+# @Author : yuyeqing
+# @File   : session.py
+# @IDE    : PyCharm
+"""多图会话: 同一文件夹内的多张凝胶图各自保留结果与组名, 解码数据放在按内存预算淘汰的 LRU 缓存中"""
+import os
+from collections import OrderedDict
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.tif', '.tiff')
+DEFAULT_BUDGET_BYTES = 1024 * 1024 * 1024
+
+
+def list_images(input_dir):
+    return sorted(os.path.join(input_dir, name) for name in os.listdir(input_dir)
+                  if name.lower().endswith(IMAGE_EXTENSIONS))
+
+
+def loaded_nbytes(loaded):
+    """LoadedImage 占用的内存: 原图、灰度图、金字塔、积分图、分析中间结果与显示缓存"""
+    arrays = [loaded.gray]
+    if loaded.original_image is not None:
+        arrays.append(loaded.original_image)
+    # 金字塔第 0 层就是原图
+    arrays.extend(loaded.pyramid.levels[1:])
+    return sum(array.nbytes for array in arrays) + loaded.pipeline.nbytes() + sum(loaded.display_bytes.values())
+
+
+class ImageCache:
+    """path -> LoadedImage 的 LRU 缓存, 总占用超出预算时从最久未用的开始淘汰, 当前显示的图像不淘汰"""
+
+    def __init__(self, budget_bytes=DEFAULT_BUDGET_BYTES):
+        self.budget_bytes = budget_bytes
+        self._images = OrderedDict()
+
+    def __contains__(self, path):
+        return path in self._images
+
+    def __len__(self):
+        return len(self._images)
+
+    def get(self, path):
+        loaded = self._images.get(path)
+        if loaded is not None:
+            self._images.move_to_end(path)
+        return loaded
+
+    def put(self, path, loaded, keep=None):
+        self._images[path] = loaded
+        self._images.move_to_end(path)
+        self.trim(keep)
+
+    def remove(self, path):
+        self._images.pop(path, None)
+
+    def clear(self):
+        self._images.clear()
+
+    def nbytes(self):
+        return sum(loaded_nbytes(loaded) for loaded in self._images.values())
+
+    def trim(self, keep=None):
+        """淘汰到预算以内, keep 为不淘汰的路径 (当前显示的图像)"""
+        sizes = OrderedDict((path, loaded_nbytes(loaded)) for path, loaded in self._images.items())
+        total = sum(sizes.values())
+        for path, size in sizes.items():
+            if total <= self.budget_bytes:
+                break
+            if path == keep:
+                continue
+            del self._images[path]
+            total -= size
+
+
+class SessionEntry:
+    """一张图像的分析状态, 切换图像时保存, 切回时恢复"""
+
+    def __init__(self, detected, results, group_names, result_key):
+        self.detected = detected
+        self.results = results
+        self.group_names = group_names
+        self.result_key = result_key
+
+
+class ImageSession:
+    def __init__(self, budget_bytes=DEFAULT_BUDGET_BYTES):
+        self.paths = []
+        self.current = None
+        self.cache = ImageCache(budget_bytes)
+        self.entries: dict[str, SessionEntry] = dict()
+
+    def open_folder_of(self, path):
+        """以 path 所在文件夹的图像列表作为会话, 已有的条目与缓存保留"""
+        path = os.path.abspath(path)
+        folder = os.path.dirname(path)
+        self.paths = list_images(folder) if os.path.isdir(folder) else []
+        if path not in self.paths:
+            self.paths.append(path)
+        return path
+
+    def index(self, path=None):
+        path = self.current if path is None else path
+        return self.paths.index(path) if path in self.paths else -1
+
+    def neighbor(self, step):
+        """当前图像前/后第 step 张的路径, 超出范围时返回 None"""
+        idx = self.index()
+        if idx < 0 or not 0 <= idx + step < len(self.paths):
+            return None
+        return self.paths[idx + step]
+
+    def neighbors(self):
+        return [path for path in (self.neighbor(1), self.neighbor(-1)) if path is not None]
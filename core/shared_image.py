@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time   : 2026/10/20 09:30
+# @Author : yuyeqing
+# @File   : shared_image.py
+# @IDE    : PyCharm
+"""供多个工作进程共享的灰度图: 主进程发布一次, 工作进程按 SharedImageHandle 挂接为 NumPy 视图, 不复制
+
+Linux 上工作进程直接映射 /dev/shm 中的对应文件, 不经过 SharedMemory 登记资源跟踪器, 进程退出时不会误删共享内存.
+优先放入 multiprocessing.shared_memory; /dev/shm 空间不足时改用临时文件内存映射 (容器中 /dev/shm 常只有 64 MB,
+超出后写入会触发 SIGBUS). 图像本身已是文件映射 (如打开内嵌图像的项目) 时直接共享该文件, 不再复制.
+"""
+import os
+import tempfile
+from multiprocessing import shared_memory
+import numpy as np
+
+SHM_BACKEND = 'shm'
+FILE_BACKEND = 'file'
+SHM_DIR = '/dev/shm'
+# 每个进程已挂接的共享图像, name -> (SharedMemory 或 None, 视图, 是否为本进程发布)
+_attached = dict()
+
+
+def _open_shm(name, shape, dtype):
+    path = os.path.join(SHM_DIR, name.lstrip('/'))
+    if os.path.exists(path):
+        return None, np.memmap(path, dtype, 'r', 0, shape)
+    shm = shared_memory.SharedMemory(name)
+    return shm, np.ndarray(shape, dtype, shm.buf)
+
+
+class SharedImageHandle:
+    """可 pickle 的引用, 只含名字、形状和类型, 传给工作进程的开销与图像大小无关"""
+
+    def __init__(self, backend, name, shape, dtype, offset=0):
+        self.backend = backend
+        self.name = name
+        self.shape = tuple(shape)
+        self.dtype = dtype
+        self.offset = offset
+
+    def attach(self):
+        """返回只读视图; 同一进程内重复挂接复用第一次的映射"""
+        attached = _attached.get(self.name)
+        if attached is not None:
+            return attached[1]
+        # 工作进程一般只处理当前图像, 换图后释放旧映射, 否则已 unlink 的共享内存会一直占用
+        for name, (shm, _, published) in list(_attached.items()):
+            if not published:
+                _attached.pop(name)
+                shm is not None and shm.close()
+        if self.backend == SHM_BACKEND:
+            shm, array = _open_shm(self.name, self.shape, np.dtype(self.dtype))
+        else:
+            shm = None
+            array = np.memmap(self.name, np.dtype(self.dtype), 'r', self.offset, self.shape)
+        array.flags.writeable = False
+        _attached[self.name] = (shm, array, False)
+        return array
+
+
+def _shm_available(nbytes):
+    if not os.path.isdir(SHM_DIR):
+        # 非 Linux 平台由系统分页文件支撑
+        return True
+    stat = os.statvfs(SHM_DIR)
+    return stat.f_bavail * stat.f_frsize >= nbytes
+
+
+class SharedImage:
+    """发布方持有的共享图像, close() 后工作进程中已有的视图仍可读, 但不能再挂接"""
+
+    def __init__(self, array):
+        array = np.ascontiguousarray(array) if not isinstance(array, np.memmap) else array
+        self._shm = None
+        self._temp_path = None
+        if isinstance(array, np.memmap) and array.filename and array.flags.c_contiguous:
+            self.handle = SharedImageHandle(FILE_BACKEND, array.filename, array.shape, array.dtype.str, array.offset)
+            self.array = array
+            _attached[self.handle.name] = (None, array, True)
+            return
+        if _shm_available(array.nbytes):
+            self._shm = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+            self.array = np.ndarray(array.shape, array.dtype, self._shm.buf)
+            self.handle = SharedImageHandle(SHM_BACKEND, self._shm.name, array.shape, array.dtype.str)
+        else:
+            fd, self._temp_path = tempfile.mkstemp(prefix='gel_image_', suffix='.raw')
+            os.close(fd)
+            self.array = np.memmap(self._temp_path, array.dtype, 'w+', 0, array.shape)
+            self.handle = SharedImageHandle(FILE_BACKEND, self._temp_path, array.shape, array.dtype.str)
+        self.array[...] = array
+        # 发布进程内挂接直接返回这份数据
+        _attached[self.handle.name] = (None, self.array, True)
+
+    @property
+    def nbytes(self):
+        return self.array.nbytes
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        """释放共享内存或删除临时文件, 可重复调用"""
+        if self.array is None:
+            return
+        _attached.pop(self.handle.name, None)
+        self.array = None
+        if self._shm is not None:
+            try:
+                self._shm.close()
+            except BufferError:
+                # 仍有视图引用时不能关闭映射, unlink 后随最后一个引用释放
+                pass
+            self._shm.unlink()
+            self._shm = None
+        if self._temp_path is not None:
+            try:
+                os.remove(self._temp_path)
+            except OSError:
+                # Windows 上仍被映射时无法删除
+                pass
+            self._temp_path = None
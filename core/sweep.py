@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time   : 2026/10/20 14:00
+# @Author : yuyeqing
+# @File   : sweep.py
+# @IDE    : PyCharm
+"""分析参数网格搜索: 在进程池中对同一图像运行参数网格, 按条带数稳定性、泳道规则性和条带重叠打分排序
+
+图像经 core.shared_image 共享给工作进程. 每个任务固定 blur 参数, 在同一个 AnalysisPipeline 上依次改 open 参数和
+背景阈值: 改 open 参数时复用 blur/binarize 阶段, 改背景阈值时复用到 contours 为止的阶段, 只重算 measure/group.
+条带数、泳道规则性和重叠只取决于 blur/open, 背景阈值由积分值随相邻阈值变化的幅度 (cutoff) 区分.
+"""
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from core import tiled
+from core.loaded_image import TILED_ANALYSIS_PIXELS
+from core.pipeline import AnalysisPipeline, DEFAULT_PARAMS
+from core.shared_image import SharedImage
+
+# 参数名 -> 候选值, 顺序决定网格相邻关系
+DEFAULT_GRID = {
+    'blur_ksize': [(3, 3), (5, 5), (7, 7), (9, 9)],
+    'open_kernel_size': [(3, 3), (5, 5)],
+    'open_iterations': [1, 2, 3],
+    'background_offset_ratio': [0.05, 0.1, 0.15, 0.2],
+}
+# 各项扣分的权重, 分数 = -加权和, 越大越好
+SCORE_WEIGHTS = {
+    'stability': 1.0,
+    'regularity': 1.0,
+    'overlap': 1.0,
+    'cutoff': 1.0,
+}
+# 每个任务固定的参数 (blur/binarize 阶段), 任务内依次改变其余参数
+_TASK_PARAMS = ('blur_ksize',)
+# 所有工作进程合计的内存上限; 每个进程约占每像素 SWEEP_PIXEL_BYTES 字节 (二值图、轮廓、积分图, 原图共享不计)
+SWEEP_MEMORY_BYTES = 4 * 1024 * 1024 * 1024
+SWEEP_PIXEL_BYTES = 10
+# 每个任务内逐个改变的参数, 只影响 measure 及之后的阶段
+_INNER_PARAMS = ('background_offset_ratio', 'background_threshold')
+
+
+class SweepResult:
+    """一个网格点的结果; params 可直接交给 set_analysis_params, background_threshold 为解析出的背景阈值"""
+
+    def __init__(self, params, background_threshold, band_count, group_count, regularity, overlap, total_value=0):
+        self.params = params
+        self.background_threshold = background_threshold
+        self.band_count = band_count
+        self.group_count = group_count
+        # 所有条带积分值之和
+        self.total_value = total_value
+        self.penalties = {'stability': 0.0, 'regularity': regularity, 'overlap': overlap, 'cutoff': 0.0}
+        self.score = 0.0
+
+
+def lane_regularity(groups):
+    """泳道中心间距的变异系数, 泳道等距时为 0; 少于 3 条泳道时无法判断, 记为 1"""
+    centers = sorted(np.mean([rect[0] + rect[2] / 2 for rect in group]) for group in groups if group)
+    if len(centers) < 3:
+        return 1.0
+    pitch = np.diff(centers)
+    return float(pitch.std() / pitch.mean()) if pitch.mean() > 0 else 1.0
+
+
+def band_overlap(groups):
+    """同一泳道内条带两两相交面积之和占条带总面积的比例"""
+    total_area = 0
+    overlap_area = 0
+    for group in groups:
+        rects = np.array([rect[:4] for rect in group], np.int64).reshape(-1, 4)
+        if not len(rects):
+            continue
+        total_area += int((rects[:, 2] * rects[:, 3]).sum())
+        x0, y0 = rects[:, 0], rects[:, 1]
+        x1, y1 = x0 + rects[:, 2], y0 + rects[:, 3]
+        w = np.minimum(x1[:, None], x1[None, :]) - np.maximum(x0[:, None], x0[None, :])
+        h = np.minimum(y1[:, None], y1[None, :]) - np.maximum(y0[:, None], y0[None, :])
+        inter = np.clip(w, 0, None) * np.clip(h, 0, None)
+        overlap_area += int(np.triu(inter, 1).sum())
+    return overlap_area / total_area if total_area else 1.0
+
+
+def _run_points(handle, fixed, points):
+    """工作进程: 固定 blur 参数, 依次运行各 open/背景参数组合 (背景参数变化最快)"""
+    gray = handle.attach()
+    # 与界面载入 (LoadedImage) 相同, 大图分块二值化, 不保留整幅中间结果
+    tile_size = tiled.TILE_SIZE if gray.size >= TILED_ANALYSIS_PIXELS else None
+    pipeline = AnalysisPipeline(gray, tile_size, **fixed)
+    results = []
+    for point in points:
+        pipeline.set_params(**point)
+        groups = pipeline.run()
+        results.append(SweepResult(dict(pipeline.params), pipeline.background_threshold,
+                                   sum(len(group) for group in groups), len(groups),
+                                   lane_regularity(groups), band_overlap(groups),
+                                   sum(rect[4] for group in groups for rect in group)))
+    return results
+
+
+def max_workers(pixels, workers=None, memory_bytes=SWEEP_MEMORY_BYTES):
+    """按图像大小限制工作进程数, 大图上并发过多会耗尽内存"""
+    workers = workers or os.cpu_count() or 1
+    return max(1, min(workers, memory_bytes // (SWEEP_PIXEL_BYTES * max(pixels, 1))))
+
+
+def grid_points(grid):
+    """按任务拆分网格: [(固定参数, [任务内参数, ...]), ...], 任务内背景参数变化最快, 依次复用上游阶段"""
+    task_names = [name for name in grid if name in _TASK_PARAMS]
+    point_names = ([name for name in grid if name not in _TASK_PARAMS and name not in _INNER_PARAMS]
+                   + [name for name in grid if name in _INNER_PARAMS])
+    points = [dict(zip(point_names, values)) for values in itertools.product(*(grid[n] for n in point_names))]
+    return [(dict(zip(task_names, values)), points)
+            for values in itertools.product(*(grid[name] for name in task_names))]
+
+
+def _grid_index(grid, params):
+    return tuple(grid[name].index(params[name]) if params[name] in grid[name] else -1 for name in grid)
+
+
+def score_results(results, grid, weights=None):
+    """计算条带数稳定性 (与网格相邻点条带数的平均相对差) 和背景阈值稳定性 (与背景参数相邻点积分值总和的
+    平均相对差, 阈值落在条带边缘或背景上时积分值随阈值变化剧烈) 并汇总分数, 返回按分数降序的列表
+    """
+    weights = dict(SCORE_WEIGHTS, **(weights or dict()))
+    inner_axes = {axis for axis, name in enumerate(grid) if name in _INNER_PARAMS}
+    by_index = {_grid_index(grid, result.params): result for result in results}
+    for index, result in by_index.items():
+        counts = []
+        totals = []
+        for axis in range(len(index)):
+            for step in (-1, 1):
+                neighbor = by_index.get(index[:axis] + (index[axis] + step,) + index[axis + 1:])
+                if neighbor is not None:
+                    counts.append(neighbor.band_count)
+                    if axis in inner_axes:
+                        totals.append(neighbor.total_value)
+        if counts and result.band_count:
+            result.penalties['stability'] = float(np.mean(np.abs(np.array(counts) - result.band_count))
+                                                  / result.band_count)
+        if totals and result.total_value:
+            result.penalties['cutoff'] = float(np.mean(np.abs(np.array(totals) - result.total_value))
+                                               / result.total_value)
+        if not result.band_count:
+            result.score = float('-inf')
+        else:
+            result.score = -sum(weights[name] * value for name, value in result.penalties.items())
+    return sorted(results, key=lambda result: result.score, reverse=True)
+
+
+def run_sweep(gray, grid=None, workers=None, mp_context=None, progress=None, weights=None):
+    """在进程池中运行参数网格, 返回按分数降序的 SweepResult 列表
+
+    gray 可以是数组或已发布的 SharedImageHandle; 进程数不超过 workers 和 max_workers 按图像大小给出的上限;
+    progress(stage) 每完成一个任务前调用, 可抛出异常中止.
+    """
+    grid = {name: [tuple(value) if isinstance(value, list) else value for value in values]
+            for name, values in (grid or DEFAULT_GRID).items()}
+    unknown = set(grid).difference(DEFAULT_PARAMS)
+    if unknown:
+        raise ValueError(f"Unknown analysis parameters: {sorted(unknown)}")
+    shared = SharedImage(gray) if isinstance(gray, np.ndarray) else None
+    handle = shared.handle if shared is not None else gray
+    tasks = grid_points(grid)
+    results = []
+    executor = ProcessPoolExecutor(max_workers(int(np.prod(handle.shape)), workers), mp_context=mp_context)
+    try:
+        futures = [executor.submit(_run_points, handle, fixed, inner) for fixed, inner in tasks]
+        for done, future in enumerate(as_completed(futures)):
+            progress and progress(f"{done}/{len(futures)}")
+            results.extend(future.result())
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        shared is not None and shared.close()
+    return score_results(results, grid, weights)
+
+
+def sweep_stages(grid=None):
+    """run_sweep 的 progress 依次报告的步骤名, 用于进度显示"""
+    total = len(grid_points(grid or DEFAULT_GRID))
+    return tuple(f"{done}/{total}" for done in range(total))
@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time   : 2026/10/20 16:30
+# @Author : yuyeqing
+# @File   : template.py
+# @IDE    : PyCharm
+"""条带布局模板: 保存当前结果的条带框, 套用到一组对齐的图像 (曝光序列/重复膜) 上批量积分
+
+图像按块从磁盘读入, 逐张建立积分图写入同一个三维缓冲区, 一块内所有图像的所有条带在一次向量化查表中得到积分值,
+与 BandIntegrator.band_values 的结果一致.
+"""
+import json
+import cv2
+import numpy as np
+from core import analysis
+from core.band_table import BandTable
+
+# 一块图像的积分图 (int32) 的字节上限, 各块复用同一缓冲区; 缓冲区过大时缺页和缓存失效反而更慢
+STACK_BYTES = 8 * 1024 * 1024
+
+
+class LayoutTemplate:
+    """条带几何 (BandTable, value 置 0)、组名和模板来源图像的尺寸 (高, 宽)"""
+
+    def __init__(self, results, group_names=None, shape=None):
+        self.results = results
+        self.group_names = dict(group_names or {})
+        self.shape = tuple(shape) if shape is not None else None
+
+    @classmethod
+    def from_results(cls, results, group_names, shape):
+        # 只保留存活的条带, 删除留下的 slot 占位仍按原 slot 号导出
+        bands = results.live_bands.copy()
+        bands['value'] = 0
+        return cls(BandTable(bands, results.group_count), group_names, shape[:2])
+
+    def __len__(self):
+        return len(self.results.bands)
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            np.savez(f, bands=self.results.bands, group_count=self.results.group_count,
+                     shape=np.array(self.shape or (0, 0)),
+                     group_names=json.dumps({str(k): v for k, v in self.group_names.items()}))
+
+
+def load_template(path):
+    with np.load(path) as data:
+        shape = tuple(data['shape'].tolist())
+        group_names = {int(k): v for k, v in json.loads(str(data['group_names'])).items()}
+        return LayoutTemplate(BandTable(data['bands'], int(data['group_count'])), group_names,
+                              shape if any(shape) else None)
+
+
+def below_threshold(gray, threshold, out=None):
+    """gray <= threshold 的掩码; 阈值先转为 gray 的类型, 与 int64 数组比较会把每个像素都提升为 int64, 慢数倍"""
+    out = np.empty(gray.shape, np.bool_) if out is None else out
+    info = np.iinfo(gray.dtype)
+    if threshold < info.min:
+        out.fill(False)
+    else:
+        np.less_equal(gray, gray.dtype.type(min(int(threshold), info.max)), out=out)
+    return out
+
+
+class StackMeasurer:
+    """对尺寸为 shape 的图像块测量 results 的条带积分值; 积分图缓冲区 (不超过 STACK_BYTES) 与掩码缓冲区在各块间复用"""
+
+    def __init__(self, results, shape):
+        height, width = shape
+        bands = results.bands
+        self.x0 = np.clip(bands['x'], 0, width)
+        self.y0 = np.clip(bands['y'], 0, height)
+        self.x1 = np.clip(bands['x'] + bands['w'], self.x0, width)
+        self.y1 = np.clip(bands['y'] + bands['h'], self.y0, height)
+        self.chunk = max(1, STACK_BYTES // (4 * (height + 1) * (width + 1)))
+        self._table = np.empty((self.chunk, height + 1, width + 1), np.int32)
+        self._mask = np.empty((height, width), np.bool_)
+
+    def measure(self, stack, thresholds):
+        """stack 为 (n, H, W) 灰度图 (n 不超过 chunk), thresholds 为每张图的背景阈值; 返回 (n, 条带数) 的积分值"""
+        count = len(stack)
+        table = self._table[:count]
+        for idx, threshold in enumerate(np.asarray(thresholds).tolist()):
+            # 与 BandIntegrator 相同: 低于等于背景阈值的像素计 255
+            below_threshold(stack[idx], threshold, self._mask)
+            cv2.integral(self._mask.view(np.uint8), table[idx], sdepth=cv2.CV_32S)
+        lookup = table[:, self.y1, self.x1] - table[:, self.y0, self.x1] - table[:, self.y1, self.x0] \
+            + table[:, self.y0, self.x0]
+        return 255 * lookup.astype(np.int64)
+
+
+def stack_band_values(stack, thresholds, results):
+    """stack 为 (N, H, W) 灰度图, thresholds 为每张图的背景阈值; 返回 (N, 条带数) 的积分值"""
+    measurer = StackMeasurer(results, stack.shape[1:])
+    values = np.empty((len(stack), len(results.bands)), np.int64)
+    for start in range(0, len(stack), measurer.chunk):
+        values[start:start + measurer.chunk] = measurer.measure(stack[start:start + measurer.chunk],
+                                                                thresholds[start:start + measurer.chunk])
+    return values
+
+
+def iter_stack(image_paths, chunk, shape=None, anydepth=False, progress=None):
+    """按顺序读入对齐的图像, 每 chunk 张产生一次 (起始序号, (n, H, W) 数组); 数组为复用的缓冲区, 下一块会覆盖.
+    尺寸与 shape 或第一张图不一致时报错
+    """
+    buffer = None
+    filled = 0
+    for idx, path in enumerate(image_paths):
+        progress and progress(path)
+        gray = analysis.load_gray(path, anydepth=anydepth)
+        if gray is None:
+            raise ValueError(f"Failed to load image: {path}")
+        if buffer is None:
+            shape = shape or gray.shape
+            buffer = np.empty((min(chunk, len(image_paths)), *shape), gray.dtype)
+        if gray.shape != tuple(shape) or gray.dtype != buffer.dtype:
+            raise ValueError(f"{path}: image is {gray.shape} {gray.dtype}, "
+                             f"expected {tuple(shape)} {buffer.dtype} like the template")
+        buffer[filled] = gray
+        filled += 1
+        if filled == len(buffer):
+            yield idx + 1 - filled, buffer
+            filled = 0
+    if filled:
+        yield len(image_paths) - filled, buffer[:filled]
+
+
+def apply_template(template, image_paths, anydepth=False, background_threshold=None,
+                   background_offset_ratio=analysis.BACKGROUND_OFFSET_RATIO, progress=None):
+    """把模板套用到 image_paths, 返回 (N, 条带数) 的积分值, 列顺序与 template.results.bands 相同
+
+    图像按块从磁盘读入并测量, 同时驻留内存的只有一块. 未指定 background_threshold 时每张图各自估计背景阈值
+    (曝光不同, 背景也不同).
+    """
+    values = np.zeros((len(image_paths), len(template.results.bands)), np.int64)
+    if not image_paths:
+        return values
+    shape = template.shape
+    if shape is None:
+        # 旧模板未记录尺寸时以第一张图为准
+        gray = analysis.load_gray(image_paths[0], anydepth=anydepth)
+        if gray is None:
+            raise ValueError(f"Failed to load image: {image_paths[0]}")
+        shape = gray.shape
+    measurer = StackMeasurer(template.results, shape)
+    for start, stack in iter_stack(image_paths, measurer.chunk, shape, anydepth, progress):
+        if background_threshold is not None:
+            thresholds = np.full(len(stack), background_threshold)
+        else:
+            thresholds = np.array([analysis.estimate_background_threshold(gray, background_offset_ratio)
+                                   for gray in stack], np.int64)
+        values[start:start + len(stack)] = measurer.measure(stack, thresholds)
+    return values
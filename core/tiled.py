@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time   : 2026/10/17 18:20
+# @Author : yuyeqing
+# @File   : tiled.py
+# @IDE    : PyCharm
+"""超大图像的分块多线程二值化, 结果与 analysis.binarize 逐像素一致"""
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+import numpy as np
+from core.analysis import BLUR_KSIZE, OPEN_KERNEL_SIZE, OPEN_ITERATIONS
+
+TILE_SIZE = 2048
+
+
+def halo_size(blur_ksize=BLUR_KSIZE, open_kernel_size=OPEN_KERNEL_SIZE, open_iterations=OPEN_ITERATIONS):
+    """模糊半径 + 开运算(腐蚀/膨胀各 open_iterations 次)半径, 块内距切边超过该值的像素结果精确"""
+    return max(blur_ksize) // 2 + 2 * open_iterations * (max(open_kernel_size) // 2) + 2
+
+
+HALO = halo_size()
+FLT_EPSILON = np.finfo(np.float32).eps
+
+
+def otsu_threshold(histogram):
+    """与 OpenCV THRESH_OTSU 相同的阈值计算, 输入为整幅图的直方图"""
+    histogram = [float(v) for v in histogram]
+    scale = 1. / sum(histogram)
+    mu = 0.
+    for i, count in enumerate(histogram):
+        mu += i * count
+    mu *= scale
+    mu1 = q1 = 0.
+    max_sigma = max_val = 0
+    for i, count in enumerate(histogram):
+        p_i = count * scale
+        mu1 *= q1
+        q1 += p_i
+        q2 = 1. - q1
+        if min(q1, q2) < FLT_EPSILON or max(q1, q2) > 1. - FLT_EPSILON:
+            continue
+        mu1 = (mu1 + i * p_i) / q1
+        mu2 = (mu - q1 * mu1) / q2
+        sigma = q1 * q2 * (mu1 - mu2) * (mu1 - mu2)
+        if sigma > max_sigma:
+            max_sigma = sigma
+            max_val = i
+    return max_val
+
+
+def iter_tiles(shape, tile_size, halo=HALO):
+    """依次给出 (带边缘的块, 块内核心区域, 核心区域在整图中的位置)"""
+    height, width = shape[:2]
+    for y in range(0, height, tile_size):
+        for x in range(0, width, tile_size):
+            y0, x0 = max(0, y - halo), max(0, x - halo)
+            y1, x1 = min(height, y + tile_size + halo), min(width, x + tile_size + halo)
+            core = (slice(y - y0, min(y + tile_size, height) - y0), slice(x - x0, min(x + tile_size, width) - x0))
+            target = (slice(y, min(y + tile_size, height)), slice(x, min(x + tile_size, width)))
+            yield (slice(y0, y1), slice(x0, x1)), core, target
+
+
+def binarize_tiled(gray, tile_size=TILE_SIZE, workers=None, blur_ksize=BLUR_KSIZE,
+                   open_kernel_size=OPEN_KERNEL_SIZE, open_iterations=OPEN_ITERATIONS):
+    """分块计算模糊 -> 全局 Otsu -> 开运算, 只额外占用一张 uint8 掩码和若干块大小的临时数组"""
+    blur_ksize, open_kernel_size = tuple(blur_ksize), tuple(open_kernel_size)
+    tiles = list(iter_tiles(gray.shape, tile_size, halo_size(blur_ksize, open_kernel_size, open_iterations)))
+    levels = int(np.iinfo(gray.dtype).max) + 1
+
+    def tile_histogram(tile):
+        window, core, _ = tile
+        blurred = cv2.GaussianBlur(gray[window], blur_ksize, 0)
+        histogram = cv2.calcHist([np.ascontiguousarray(blurred[core])], [0], None, [levels], [0, levels])
+        # 单块像素数远小于 2^24, float32 计数无误差
+        return histogram.ravel().astype(np.int64)
+
+    binary = np.empty(gray.shape[:2], np.uint8)
+    kernel = np.ones(open_kernel_size, np.uint8)
+
+    def tile_binarize(tile, threshold):
+        window, core, target = tile
+        # 第二遍重新模糊, 避免保留整幅模糊图
+        blurred = cv2.GaussianBlur(gray[window], blur_ksize, 0)
+        _, thresh = cv2.threshold(blurred, threshold, 255, cv2.THRESH_BINARY_INV)
+        if thresh.dtype != np.uint8:
+            thresh = thresh.astype(np.uint8)
+        opening = cv2.morphologyEx(thresh, cv2.MORPH_OPEN, kernel, iterations=open_iterations)
+        binary[target] = opening[core]
+
+    # OpenCV 在计算时释放 GIL, 线程池即可并行
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        histogram = sum(executor.map(tile_histogram, tiles))
+        threshold = otsu_threshold(histogram)
+        list(executor.map(tile_binarize, tiles, [threshold] * len(tiles)))
+    return binary
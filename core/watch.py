@@ -0,0 +1,212 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time   : 2026/10/19 16:30
+# @Author : yuyeqing
+# @File   : watch.py
+# @IDE    : PyCharm
+"""监视文件夹: 轮询新出现的凝胶图, 在进程池中分析, 结果追加到滚动 CSV
+
+- 写入中的文件: 大小与修改时间连续 settle_seconds 不变才提交; 解码失败的文件等再次稳定后重试
+- 已处理索引: 每个文件按 (相对路径, 大小, 修改时间) 记入 JSON 行索引, 重启后跳过; 先写 CSV 再写索引,
+  中断时最多重复处理一次
+- 背压: 同时提交到进程池的文件不超过 max_in_flight, 其余按发现顺序排队, 不再占用进程池队列
+"""
+import os
+import csv
+import json
+import time
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from core.session import IMAGE_EXTENSIONS
+from core.export import ColorNames, result_rows
+
+DEFAULT_POLL_INTERVAL = 2.0
+DEFAULT_SETTLE_SECONDS = 1.0
+DEFAULT_MAX_ATTEMPTS = 3
+
+
+class ProcessedIndex:
+    """已处理文件的追加式索引, 同名文件内容变化 (大小或修改时间不同) 后会重新处理"""
+
+    def __init__(self, path):
+        self.path = path
+        self._keys = set()
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # 中断时可能留下半行
+                        continue
+                    self._keys.add((record['file'], record['size'], record['mtime_ns']))
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def __len__(self):
+        return len(self._keys)
+
+    def add(self, key, status, **extra):
+        name, size, mtime_ns = key
+        self._keys.add(key)
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(dict(extra, file=name, size=size, mtime_ns=mtime_ns, status=status,
+                                    time=time.time())) + '\n')
+
+
+class RollingCsv:
+    """多张图像共用的 CSV, 每行前加 File 列, 其余与 export_to_csv 相同; 出现新的颜色名列时重写表头"""
+
+    def __init__(self, path):
+        self.path = path
+        self.fieldnames = []
+        if os.path.exists(path) and os.path.getsize(path):
+            with open(path, 'r', newline='') as f:
+                self.fieldnames = next(csv.reader(f), [])
+
+    def append(self, file_name, rows, slot_names):
+        fieldnames = ['File', 'Group'] + list(slot_names)
+        missing = [name for name in fieldnames if name not in self.fieldnames]
+        if missing:
+            self._extend(self.fieldnames + missing)
+        with open(self.path, 'a', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=self.fieldnames)
+            writer.writerows(dict(row, File=file_name) for row in rows)
+
+    def _extend(self, fieldnames):
+        existing = []
+        if self.fieldnames:
+            with open(self.path, 'r', newline='') as f:
+                existing = list(csv.DictReader(f))
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            writer.writeheader()
+            writer.writerows(existing)
+        os.replace(temp_path, self.path)
+        self.fieldnames = fieldnames
+
+
+class FolderWatcher:
+    """analyze(path) -> BandTable 在进程池中执行, 需可 pickle (模块级函数或其 partial)
+
+    on_result(file_name, results, error) 在调用 run/step 的线程中回调, 成功时 error 为 None.
+    """
+
+    def __init__(self, input_dir, csv_path, analyze, color_names=None, index_path=None, workers=None,
+                 poll_interval=DEFAULT_POLL_INTERVAL, settle_seconds=DEFAULT_SETTLE_SECONDS,
+                 max_in_flight=None, max_attempts=DEFAULT_MAX_ATTEMPTS, mp_context=None, on_result=None):
+        self.input_dir = input_dir
+        self.analyze = analyze
+        self.color_names = ColorNames(color_names or dict())
+        self.csv = RollingCsv(csv_path)
+        self.index = ProcessedIndex(index_path or csv_path + '.index.jsonl')
+        self.poll_interval = poll_interval
+        self.settle_seconds = settle_seconds
+        self.max_attempts = max_attempts
+        self.on_result = on_result
+        workers = workers or os.cpu_count() or 1
+        self._executor = ProcessPoolExecutor(max_workers=workers, mp_context=mp_context)
+        self.max_in_flight = max_in_flight or 2 * workers
+        # 文件名 -> (大小, 修改时间, 首次观察到该状态的时间)
+        self._observed = dict()
+        self._attempts = dict()
+        self._queued = deque()
+        self._queued_names = set()
+        self._in_flight = dict()
+        self._stop = threading.Event()
+
+    @property
+    def backlog(self):
+        """已稳定但尚未完成分析的文件数"""
+        return len(self._queued) + len(self._in_flight)
+
+    def poll(self):
+        """扫描一次文件夹, 把已写完且未处理过的文件加入队列"""
+        now = time.monotonic()
+        busy = self._queued_names.union(key[0] for key in self._in_flight.values())
+        seen = set()
+        for entry in os.scandir(self.input_dir):
+            name = entry.name
+            if name.startswith('.') or not name.lower().endswith(IMAGE_EXTENSIONS) or not entry.is_file():
+                continue
+            seen.add(name)
+            if name in busy:
+                continue
+            stat = entry.stat()
+            key = (name, stat.st_size, stat.st_mtime_ns)
+            if key in self.index:
+                continue
+            observed = self._observed.get(name)
+            if observed is None or observed[:2] != key[1:]:
+                # 新文件或仍在写入
+                self._observed[name] = (stat.st_size, stat.st_mtime_ns, now)
+                continue
+            if stat.st_size == 0 or now - observed[2] < self.settle_seconds:
+                continue
+            del self._observed[name]
+            self._queued.append(key)
+            self._queued_names.add(name)
+        for name in set(self._observed).difference(seen):
+            del self._observed[name]
+
+    def step(self):
+        """轮询、收集已完成的任务并按容量提交排队的文件, 返回本次完成的文件数"""
+        self.poll()
+        done = self._collect()
+        while self._queued and len(self._in_flight) < self.max_in_flight:
+            key = self._queued.popleft()
+            self._queued_names.discard(key[0])
+            future = self._executor.submit(self.analyze, os.path.join(self.input_dir, key[0]))
+            self._in_flight[future] = key
+        return done
+
+    def _collect(self):
+        finished = [future for future in self._in_flight if future.done()]
+        for future in finished:
+            key = self._in_flight.pop(future)
+            name = key[0]
+            if future.cancelled():
+                continue
+            try:
+                results = future.result()
+            except Exception as e:
+                attempts = self._attempts.get(name, 0) + 1
+                self._attempts[name] = attempts
+                if attempts < self.max_attempts:
+                    # 可能读到了未写完的文件, 等它再次稳定后重试
+                    continue
+                self._attempts.pop(name, None)
+                self.index.add(key, 'failed', error=str(e))
+                self.on_result and self.on_result(name, None, e)
+                continue
+            self._attempts.pop(name, None)
+            rows = result_rows(results, dict(), self.color_names)
+            self.csv.append(name, rows, [color_name for _, color_name in self.color_names.items()])
+            self.index.add(key, 'ok', groups=len(results))
+            self.on_result and self.on_result(name, results, None)
+        return len(finished)
+
+    def run(self, progress=None):
+        """轮询直到 stop(); progress(stage) 每轮调用一次, 可抛出异常中止 (如后台 Task 被取消)"""
+        try:
+            while not self._stop.is_set():
+                progress and progress('poll')
+                self.step()
+                if self._in_flight:
+                    # 有任务在执行时完成一个就及时写出
+                    wait(list(self._in_flight), self.poll_interval, FIRST_COMPLETED)
+                else:
+                    self._stop.wait(self.poll_interval)
+        finally:
+            self.close()
+
+    def stop(self):
+        self._stop.set()
+
+    def close(self):
+        """等待已提交的文件完成并写出结果, 排队中的文件下次启动时重新发现"""
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self._collect()
@@ -0,0 +1,34 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time   : 2026/10/19 21:40
+# @Author : yuyeqing
+# @File   : serve.py
+# @IDE    : PyCharm
+import sys
+import argparse
+from core.service import AnalysisServer, AnalysisClient, DEFAULT_SOCKET
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Keep warm analysis workers and serve jobs over a local socket.")
+    parser.add_argument('-s', '--socket', default=DEFAULT_SOCKET, help="unix socket path")
+    parser.add_argument('-p', '--port', type=int, help="listen on 127.0.0.1:PORT instead of a unix socket")
+    parser.add_argument('-j', '--workers', type=int, default=None, help="number of worker processes")
+    parser.add_argument('--stop', action='store_true', help="ask a running service to shut down")
+    args = parser.parse_args(argv)
+
+    address = ('127.0.0.1', args.port) if args.port else args.socket
+    if args.stop:
+        with AnalysisClient(address) as client:
+            client.shutdown()
+        return 0
+    server = AnalysisServer(address, args.workers)
+    try:
+        server.run(ready=lambda: print(f"Serving {server.workers} workers on {address}", flush=True))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -14,3 +14,7 @@ CONTOUR_COLOR_LIST = [
     (255, 0, 255, 200), # Magenta
     (0, 255, 255, 200)  # Cyan
 ]
+
+# 条带框绘制模式
+OVERLAY_WIDGETS = 'widgets'   # 每个条带一个 ContourWidget
+OVERLAY_CANVAS = 'canvas'     # 单个 OverlayCanvas 统一绘制
@@ -6,6 +6,8 @@
 # @IDE    : PyCharm
 import os
 import sys
+from functools import lru_cache
+from PyQt6.QtGui import QIcon
 
 
 def resource_path(relative_path):
@@ -18,3 +20,9 @@ def resource_path(relative_path):
         base_path = os.path.abspath(".")
 
     return os.path.join(base_path, relative_path)
+
+
+@lru_cache(maxsize=None)
+def cached_icon(relative_path):
+    """同一图标只创建一次, 大量按钮共用同一个 QIcon"""
+    return QIcon(resource_path(relative_path))